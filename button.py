@@ -42,23 +42,24 @@ class Button:
         self.label = Text(center, label)
         self.label.setSize(16)
         self.label.setStyle("bold")
+        self.group = Group(self.rect, self.label) # so the parts are drawn/moved together
         self.active = False
 
     def draw(self,win):
         """Draws the button on the window"""
-        self.rect.draw(win)
-        self.label.draw(win)
+        self.group.draw(win)
 
     def undraw(self):
         """undraw the button"""
-        self.rect.undraw()
-        self.label.undraw()        
+        self.group.undraw()
 
         
     def isClicked(self, point):
         "Returns true if button active and point is inside"
-        xIsGood = self.rect.getP1().getX() < point.getX() < self.rect.getP2().getX()
-        yIsGood = self.rect.getP1().getY() < point.getY() < self.rect.getP2().getY()
+        p1 = self.rect.getP1Vec()
+        p2 = self.rect.getP2Vec()
+        xIsGood = p1.x < point.getX() < p2.x
+        yIsGood = p1.y < point.getY() < p2.y
         
         if xIsGood and yIsGood:
             return True
@@ -91,8 +92,7 @@ class Button:
 
     def move(self, dx, dy):
         "Move the button by offsets dx and dy"
-        self.rect.move(dx, dy)
-        self.label.move(dx,dy)
+        self.group.move(dx, dy)
 
 
     def __str__(self):
@@ -6,9 +6,8 @@ I used chat gpt to generate a method to print the cards in a specific position e
 from graphics2 import *
 import random
 from constants import * 
-from cards import Card
+from cards import Card, preloadCardImages
 from button import Button
-import time
 
 def randomColor():
     return random.choice(["red", "blue", "green", "yellow", "purple", "orange"])
@@ -24,9 +23,11 @@ def validateInput(input, win):
 def displayOpeningScreenAndGetSettings():
     win = GraphWin("Card Match Game", WINDOW_WIDTH, WINDOW_HEIGHT)
     win.setBackground("green")
-    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), "PNG-cards-1.3/background.png")
+    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), BACKGROUND_IMAGE)
     background.scale(2.2)
+    win.getLayer("background").add(background)
     background.draw(win)
+    preloadCardImages() # the cards get ready while the player chooses the settings
     
     instruction = Text(Point(WINDOW_WIDTH//2,200),"press start button to start the game")
     instruction.setSize(20)
@@ -96,6 +97,13 @@ def getClickedCard(win, cards):
             
 def hasUnflippedCards(cards):
     return any(not card.isFlipped() for card in cards)
+
+def turnBack(win, *cards):
+    for card in cards:
+        card.back(win)
+
+def isWaiting(timers):
+    return any(timer.isActive() for timer in timers)
             
 
 def playSingle(numCards):
@@ -108,23 +116,31 @@ def playSingle(numCards):
     win = GraphWin("Card Match Game", WINDOW_WIDTH, WINDOW_HEIGHT)
     win.setBackground("green")
     
-    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), "PNG-cards-1.3/background.png")
+    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), BACKGROUND_IMAGE)
     background.scale(2.2)
+    win.getLayer("background").add(background)
     background.draw(win)
     
     score_current = Text(Point(WINDOW_WIDTH//2, 50), f"Score: {score}")
     score_current.setSize(20)
     score_current.draw(win)
 
-    while hasUnflippedCards(cards):
+    board = Compositor(win, layer="board") if USE_BOARD_COMPOSITOR else None
+    flipBacks = [] # timers turning mismatched cards back over
+
+    while hasUnflippedCards(cards) or isWaiting(flipBacks):
         
         card_positions = []
-        for i in range(len(cards)):
-            x = (i % 7) * 100 + 250
-            y = (i // 7) * 150 + 200
-            if not cards[i].isFlipped():
-                cards[i].draw(win, x, y)
-            card_positions.append((x, y))
+        with win.batch():
+            for i in range(len(cards)):
+                x = (i % 7) * 100 + 250
+                y = (i // 7) * 150 + 200
+                if not cards[i].isFlipped():
+                    if board:
+                        cards[i].drawOnBoard(board, x, y)
+                    else:
+                        cards[i].draw(win, x, y)
+                card_positions.append((x, y))
 
         firstCard = getClickedCard(win, cards)
         while firstCard == None:
@@ -139,9 +155,8 @@ def playSingle(numCards):
         if firstCard.cardValue() == secondCard.cardValue():
             score += 1
         else:
-            time.sleep(1)
-            firstCard.back(win)
-            secondCard.back(win)
+            # the cards turn back over after a second, and the player can carry on meanwhile
+            flipBacks.append(win.schedule(1, turnBack, win, firstCard, secondCard))
             if score > 0:
                 score -= 1
         score_current.setText(f"Score: {score}")
@@ -150,7 +165,7 @@ def playSingle(numCards):
     winner.setFill(randomColor())
     winner.setSize(50)
     winner.draw(win)
-    time.sleep(2)
+    win.pause(2)
     win.close()
     
     return score
@@ -165,8 +180,9 @@ def playMulti(numCards):
     win = GraphWin("Card Match Game", WINDOW_WIDTH, WINDOW_HEIGHT)
     win.setBackground("green")
     
-    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), "PNG-cards-1.3/background.png")
+    background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), BACKGROUND_IMAGE)
     background.scale(2.2)
+    win.getLayer("background").add(background)
     background.draw(win)
     
     scoreP1Text = Text(Point(WINDOW_WIDTH//5, 70), f"player one: {score_P1}")
@@ -185,15 +201,22 @@ def playMulti(numCards):
     turn.setSize(20)
     turn.draw(win)
 
-    while hasUnflippedCards(cards):
+    board = Compositor(win, layer="board") if USE_BOARD_COMPOSITOR else None
+    flipBacks = [] # timers turning mismatched cards back over
+
+    while hasUnflippedCards(cards) or isWaiting(flipBacks):
         
         card_positions = []
-        for i in range(len(cards)):
-            x = (i % 7) * 100 + 250
-            y = (i // 7) * 150 + 200
-            if not cards[i].isFlipped():
-                cards[i].draw(win, x, y)
-            card_positions.append((x, y))
+        with win.batch():
+            for i in range(len(cards)):
+                x = (i % 7) * 100 + 250
+                y = (i // 7) * 150 + 200
+                if not cards[i].isFlipped():
+                    if board:
+                        cards[i].drawOnBoard(board, x, y)
+                    else:
+                        cards[i].draw(win, x, y)
+                card_positions.append((x, y))
 
 
         if player%2 == 1:
@@ -225,9 +248,7 @@ def playMulti(numCards):
                 player = 1
                 score_P2 +=1
         else:
-            time.sleep(1)
-            firstCard.back(win)
-            secondCard.back(win)
+            flipBacks.append(win.schedule(1, turnBack, win, firstCard, secondCard))
 
         if player == 1:
             player = 2
@@ -247,12 +268,15 @@ def playMulti(numCards):
     winner.setFill(randomColor())
     winner.setSize(50)
     winner.draw(win)
-    time.sleep(2)
+    win.pause(2)
     win.close()
     
     return winner.getText(), winner_score
 
 def main():
+    # the card back and background are used all the time, so never evict them from the image cache
+    Image.fileCache.pin(CARD_BACK_IMAGE)
+    Image.fileCache.pin(BACKGROUND_IMAGE)
     continueGame = True
 
     while continueGame:
@@ -263,8 +287,9 @@ def main():
             win = GraphWin("game over", WINDOW_WIDTH, WINDOW_HEIGHT)
             win.setBackground("green")
         
-            background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), "PNG-cards-1.3/background.png")
+            background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), BACKGROUND_IMAGE)
             background.scale(2.2)
+            win.getLayer("background").add(background)
             background.draw(win)
 
             winner = Text(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), f"completed with {score} score.")
@@ -274,8 +299,9 @@ def main():
             win = GraphWin("game over", WINDOW_WIDTH, WINDOW_HEIGHT)
             win.setBackground("green")
         
-            background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), "PNG-cards-1.3/background.png")
+            background = Image(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), BACKGROUND_IMAGE)
             background.scale(2.2)
+            win.getLayer("background").add(background)
             background.draw(win)
 
             winner = Text(Point(WINDOW_WIDTH//2, WINDOW_HEIGHT//2), f"{winner} with {score} score.")
@@ -8,6 +8,8 @@ class Card:
         self.rank = rank
         self.face_up = False
         self.card_name = self.rank + "_" + self.suit
+        self.card = None
+        self.board = None # the Compositor this card is shown on, if any
         
 
     def isFlipped(self):
@@ -24,42 +26,74 @@ class Card:
         self._updateVisual(win)
         
     def draw(self, win, x, y):
+        if self.card is not None and self.card.canvas is win:
+            # already on this board: just move it and show the right side
+            self.card.setCenter(Point(x, y))
+            self._updateVisual(win)
+            return
+        if self.card is not None:
+            self.card.undraw()
+        self._createImage(x, y)
+        win.getLayer("board").add(self.card) # cards always stay above the background
+        self.card.draw(win)
+
+    def drawOnBoard(self, board, x, y):
+        # shows the card as part of a Compositor's image instead of as its own canvas item
+        if self.card is None or self.board is not board:
+            if self.card is not None:
+                self.card.undraw()
+            self._createImage(x, y)
+        else:
+            center = self.card.getCenterVec()
+            self.card.move(x - center.x, y - center.y)
+        self.board = board
+        board.place(self, self.card, x, y)
+
+    def _createImage(self, x, y):
         if self.face_up:
-            self.card = Image(Point(x, y), "PNG-cards-1.3/" + self.card_name  + ".png")
+            self.card = Image(Point(x, y), cardImageFile(self.rank, self.suit))
             self.card.scale(0.3)
-            self.card.draw(win)
-
         else:
-            self.card = Image(Point(x, y), "PNG-cards-1.3/back.png")
-            self.card.scale(0.09)
-            self.card.draw(win)
+            self.card = Image(Point(x, y), CARD_BACK_IMAGE)
+            self.card.scale(CARD_BACK_SCALE)
 
     def cardValue(self):
         return self.card_name
     
     def _updateVisual(self, win):
+        # the card keeps its canvas item: only the picture it shows is swapped
         if self.face_up:
-            self.card.undraw()
-            self.card = Image(self.card.getCenter(), "PNG-cards-1.3/" + self.card_name  + ".png")
-            self.card.scale(0.13)
-            self.card.draw(win)
+            self.card.load(cardImageFile(self.rank, self.suit), CARD_FACE_SCALE)
         else:
-            self.card.undraw()
-            self.card = Image(self.card.getCenter(), "PNG-cards-1.3/back.png")
-            self.card.scale(0.09)
-            self.card.draw(win) 
+            self.card.load(CARD_BACK_IMAGE, CARD_BACK_SCALE)
+        if self.board is not None:
+            self.board.setSprite(self, self.card) # recomposites just this card
 
     
     def isClicked(self, click_point):
         if click_point is None:
             return False
         else:
-            x_min = self.card.getCenter().getX() - 20 
-            x_max = self.card.getCenter().getX() + 20 
-            y_min = self.card.getCenter().getY() - 40
-            y_max = self.card.getCenter().getY() + 40
+            center = self.card.getCenterVec()
+            x_min = center.x - 20 
+            x_max = center.x + 20 
+            y_min = center.y - 40
+            y_max = center.y + 40
 
         return x_min <= click_point.getX() <= x_max and y_min <= click_point.getY() <= y_max
     
     def __str__(self):  
-        return f"{self.rank} of {self.suit} is face up: {self.face_up}" 
\ No newline at end of file
+        return f"{self.rank} of {self.suit} is face up: {self.face_up}" 
+
+def cardImageFile(rank, suit):
+    # the file names are all lower case (which matters on Linux, e.g. in CI)
+    return CARD_IMAGE_FOLDER + (rank + "_" + suit).lower() + ".png"
+
+def cardImageFiles():
+    return [cardImageFile(rank, suit) for suit in SUITS for rank in RANKS]
+
+def preloadCardImages():
+    # decodes (and scales) all the card images in the background, so flipping a card never has to wait
+    facesPreloader = ImagePreloader(cardImageFiles(), scaleFactors=[CARD_FACE_SCALE]).start()
+    backPreloader = ImagePreloader([CARD_BACK_IMAGE], scaleFactors=[CARD_BACK_SCALE]).start()
+    return facesPreloader, backPreloader
\ No newline at end of file
@@ -3,6 +3,13 @@
 SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
 RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "jack", "queen", "king", "ace"]
 
+CARD_IMAGE_FOLDER = "PNG-cards-1.3/"
+CARD_BACK_IMAGE = CARD_IMAGE_FOLDER + "back.png"
+BACKGROUND_IMAGE = CARD_IMAGE_FOLDER + "background.png"
+CARD_FACE_SCALE = 0.13
+CARD_BACK_SCALE = 0.09
+USE_BOARD_COMPOSITOR = False # draw all the cards as one image (faster for very big boards)
+
 WINDOW_WIDTH = 1000
 WINDOW_HEIGHT = 800
 
@@ -66,7 +66,7 @@ Also, Dr. Forrest Stonedahl has made several enahancements to the original
 graphics.py, and these described in a separate document.
 """
 
-__version__ = "6.1"
+__version__ = "6.2"
 
 
 # TODO LIST FOR FUTURE FEATURES:
@@ -89,6 +89,71 @@ __version__ = "6.1"
 #      (tried this on Isabelle's Mac, and then we lost some updates.  Also didn't seem hugely faster?)
 #
 #
+# Version 6.2 modifications:
+#   Added SpriteCache (shared as Image.spriteCache) so that scaled/flipped images loaded
+#     from files are only rescaled once per (file, scale, flip) combination.  Like ImageCache,
+#     it evicts the least recently used sprites when they take up more than maxBytes.
+#   Image flipping now copies the whole image in one Tk call (instead of pixel by pixel),
+#     and remembers the flipped versions of each source image.
+#   GraphWin.getMouse() and getKey() now wait on Tk events instead of polling every 0.1 seconds,
+#     and take an optional timeout (in seconds).
+#   Added asyncio support: runAsync(coroutine), and awaitable GraphWin.mouse(), key() and sleep(seconds)
+#     (Tk events are only pumped while windows are open, and less often when nothing awaits input.)
+#   Added GraphWin.batch() (with win.batch(): ...) and the @batched decorator, which draw many
+#     things with just one window update at the end.  See GraphWin.getBatchStats()
+#   GraphWin.items is now a dict (in drawing order) so undrawing is O(1), and GraphWin.clear()
+#     deletes everything with a single Tk call.
+#   GraphWin.setCoords() now moves the existing canvas items to their new locations
+#     instead of undrawing and redrawing every object.
+#   Replaced the LRU cache of 40 image files with Image.fileCache (an ImageCache), which is limited
+#     by decoded size, keeps statistics, and supports preload(filenames) and pin(filename).
+#   Added ImagePreloader, which reads image files on worker threads and decodes them into the
+#     image cache in small slices while Tk is idle.
+#   Image scaling finds the closest usable fraction with a binary search (and remembers recent
+#     answers), and plans the zoom/subsample steps to create fewer intermediate pixels.
+#     Set Image.accurateScaling = True to allow two-stage fractions that get closer to the
+#     requested size.  See _benchmarkScaling()
+#   Image scaling never creates intermediate images bigger than Image.maxIntermediatePixels (it copies
+#     a row/column at a time instead), and Image.scalingMode = "area" shrinks images by averaging
+#     pixels, which looks smoother than Tk's subsampling.
+#   Added Image.getPixels(region) and Image.putPixels(region, pixels) to read/write whole rectangles
+#     of pixels at once (as bytes or NumPy arrays).
+#   GraphWin.plot() and plotPixel() now draw into a Framebuffer (one image on the canvas) instead of
+#     creating a canvas item per pixel.  Pixels are written in bulk when the window updates.
+#   Polygon stores its vertices in compact arrays, converts them to screen coordinates all at once
+#     (Transform.screenMany/worldMany, GraphWin.toScreenMany), and caches its bounding box.
+#   Added Vec2, a lightweight immutable (x,y) value for geometry, and getCenterVec(), getP1Vec() and
+#     getP2Vec(), which return one without creating (cloned) Point objects. Each object keeps the
+#     last Vec2 it handed out and returns that same one until the object moves.
+#   Image.load(filename, scalingFactor) loads and scales a new picture in one step, reusing the
+#     Image's canvas item (so its stacking order is kept) if it is drawn.
+#   Added Group, which draws/undraws/moves/lifts/lowers/recolors several objects with one Tk call
+#     (using a canvas tag), and GraphWin.getLayer(name) for the fixed "background", "board" and "hud"
+#     stacking layers. A layer only holds on to its objects while they are drawn (or not drawn yet).
+#   Added Compositor, which renders many sprites into one offscreen image (a single canvas item) and
+#     only recomposites the rectangle of a sprite that changed, from the sprites a coarse grid finds there.
+#   Images loaded from files aren't decoded until their pixels are needed (when drawn, or by getWidth(),
+#     getPixel(), ...), and any scaling/flipping done before then is applied in one step.
+#   Image.clone() no longer copies the pixels: clones share them (see Image.pixelStore) until one of
+#     them is modified.
+#   Closing a GraphWin now frees everything drawn in it (including Image.imageCache entries) and the
+#     images it owned.  memory_report() lists the images graphics2 is keeping alive, and their sizes.
+#   Added a "headless" backend (GRAPHICS2_BACKEND=headless, in graphics2_headless.py) that runs without
+#     a display: items are recorded in memory and GraphWin.rasterize() draws them into an Image.  Both
+#     backends provide the small interface described in _TkBackend, which is all graphics2 uses.
+#     GraphWin.simulateClick() and simulateKey() feed input to a window on either backend, and
+#     onWindowCreated() hands each new window to a callback so a test can script a whole program's
+#     input.  getBackend() names the backend.
+#   Added CommandQueue, which lets other threads hand drawing work (as functions returning futures)
+#     to the Tk thread, which runs it in batches while processing events.
+#   Added GraphWin.schedule() and scheduleRepeating(), which run functions later from Tk's event loop
+#     (returning Timers that can be cancelled), and GraphWin.pause(), a time.sleep() that keeps the
+#     window responsive.
+#   Clicks and key presses are kept, with the time they arrived, in a bounded buffer
+#     (GraphWin.inputEvents) instead of a single slot, so getMouse()/getKey() and friends handle
+#     every one of them, in order, even those that arrived before the call.  (So checkMouse() and
+#     checkKey() now return the oldest click/key press not handled yet, rather than the latest.)
+#
 # Version 6.1 modifications:
 #   Added (...topLeftX=?,topLeftY=?) optional keyword parameters to GraphWin constructor to position window on screen
 #   Added comments at top to avoid mypy & flake8 & pylint checking, so it won't flood
@@ -232,11 +297,30 @@ import time as _time
 import os as _os
 import math as _math
 import functools as _functools
+import bisect as _bisect
+import weakref as _weakref
+import asyncio as _asyncio
+import contextlib as _contextlib
+import collections as _collections
+import queue as _queue
+import threading as _threading
+import concurrent.futures as _futures
+import array as _array
+import re as _re
+import types as _types
 
 try:  # import as appropriate for 2.x vs. 3.x
     import tkinter as _tk
-except:
-    import Tkinter as _tk
+except ImportError:
+    try:
+        import Tkinter as _tk
+    except ImportError: # no Tk: only the headless backend (see below) can be used
+        _tk = None
+
+try:  # optional: used to speed up some pixel operations
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
 
 
 ##########################################################################
@@ -250,11 +334,171 @@ _OBJ_ALREADY_DRAWN = "Object currently drawn"
 _UNSUPPORTED_METHOD = "Object doesn't support operation"
 _BAD_OPTION = "Illegal option value"
 
+##########################################################################
+# Backends
+#
+# graphics2 normally draws with Tk (the "tk" backend).  The "headless"
+# backend (HeadlessBackend, in graphics2_headless.py) runs without a
+# display: windows and canvas items are only recorded, images aren't
+# decoded or scaled until somebody looks at their pixels, and waiting for
+# a timer skips straight ahead instead of sleeping.  GraphWin.rasterize()
+# draws a window's items into an Image on demand.  Since it needs no
+# display, programs can run unchanged (and quickly) in batch jobs and
+# automated tests, with GraphWin.simulateClick() and simulateKey()
+# standing in for the user (onWindowCreated() gets hold of the windows a
+# program opens itself, so its input can be scripted).
+#
+# Choose it by setting the environment variable GRAPHICS2_BACKEND=headless
+# before importing graphics2.  It is also used automatically when Tk isn't
+# installed or can't open a display (unless GRAPHICS2_BACKEND=tk).
+
+class _TkBackend:
+
+    """Draws with Tk.  The backends all provide this interface, which is the
+    only way the rest of graphics2 uses the toolkit:
+
+    Tk, Toplevel, Canvas, Frame, Entry, StringVar, IntVar -- widget classes.
+        GraphWin is a Canvas, and GraphicsObjects draw with its create_*(),
+        coords(), move(), itemconfig(), tag_raise(), ... methods
+    Error -- the exception the toolkit raises
+    Images are the toolkit's photo images.  Besides passing them to the
+    canvas, graphics2 only calls their width(), height(), get(x,y), blank()
+    and write(filename, format) methods; everything else goes through the
+    methods below."""
+
+    name = "tk"
+
+    def __init__(self):
+        self.Tk, self.Toplevel, self.Canvas, self.Frame = _tk.Tk, _tk.Toplevel, _tk.Canvas, _tk.Frame
+        self.Entry, self.StringVar, self.IntVar = _tk.Entry, _tk.StringVar, _tk.IntVar
+        self.Error = _tk.TclError
+        self.root = None
+
+    def start(self):
+        """creates and returns the hidden root window"""
+        self.root = _tk.Tk()
+        self.root.withdraw()
+        return self.root
+
+    def now(self):
+        """the current time (in seconds) for timestamping input events"""
+        return _time.time()
+
+    def font(self, **options):
+        return _tk.font.Font(**options)
+
+    def newImage(self, width=0, height=0, master=None):
+        """returns a new transparent image (which grows to fit what's copied into it if its size is 0)"""
+        return _tk.PhotoImage(master=master or self.root, width=width, height=height)
+
+    def loadImage(self, filename=None, data=None):
+        """returns a new image decoded from the file or the bytes of an image file"""
+        if filename is not None:
+            return _tk.PhotoImage(file=filename, master=self.root)
+        return _tk.PhotoImage(data=data, master=self.root)
+
+    def deleteImage(self, img):
+        """frees the image (which must not be used any more)"""
+        img.tk.call("image", "delete", img.name)
+
+    def copyImage(self, target, source, region=None, to=None, zoom=None, subsample=None, overlay=True):
+        """copies the region (x1,y1,x2,y2) of source (default: all of it) into
+        target with its top left corner at to=(x,y), zoomed by zoom=(zoomX,zoomY)
+        after subsampling by subsample=(subsampleX,subsampleY) (negative
+        subsampling mirrors it).  overlay=False replaces the target's pixels
+        instead of blending over them."""
+        options = []
+        if region is not None: options += ["-from"] + list(region)
+        if to is not None: options += ["-to"] + list(to)
+        if zoom is not None: options += ["-zoom"] + list(zoom)
+        if subsample is not None: options += ["-subsample"] + list(subsample)
+        if not overlay: options += ["-compositingrule", "set"]
+        target.tk.call(target.name, "copy", source.name, *options)
+
+    def getRGB(self, img, region=None, background=None):
+        """returns the RGB pixel data (3 bytes per pixel) of the image, or of
+        the region (x1, y1, x2, y2) of it, reading it all with one Tk call.  If a
+        background color is given, (partly) transparent pixels are blended with it."""
+        options = []
+        if region is not None:
+            options += ["-from"] + list(region)
+        if background is not None:
+            options += ["-background", background]
+        rows = img.tk.call(img.name, "data", *options)
+        if isinstance(rows, str):
+            rows = img.tk.splitlist(rows)
+        return bytearray.fromhex(" ".join(rows).replace("#", " "))
+
+    def putRGB(self, img, x, y, width, height, rgb):
+        """writes RGB pixel data (3 bytes per pixel) into the image with one Tk call"""
+        if width == 0 or height == 0:
+            return
+        try: # as a binary PPM image, which Tk can read straight from the bytes
+            header = "P6 {} {} 255\n".format(width, height).encode("ascii")
+            img.tk.call(img.name, "put", header + rgb, "-format", "ppm", "-to", x, y)
+        except _tk.TclError: # older Tk versions: use a list of rows of color strings
+            hexDigits = rgb.hex()
+            colors = ["#" + hexDigits[i:i+6] for i in range(0, len(hexDigits), 6)]
+            self.putColors(img, x, y, [colors[row*width:(row+1)*width] for row in range(height)])
+
+    def putColors(self, img, x, y, rows):
+        """sets the pixels starting at (x,y) to the colors in rows (a list of
+        rows, each a list of color names or "#rrggbb" strings) with one Tk call"""
+        # each color is braced: color names can contain spaces ("light gray")
+        data = " ".join("{" + " ".join("{" + color + "}" for color in row) + "}" for row in rows)
+        img.tk.call(img.name, "put", data, "-to", x, y)
+
+    def setTransparent(self, img, x, y, transparent=True):
+        img.tk.call(img.name, "transparency", "set", x, y, transparent)
+
+    def rasterize(self, canvas):
+        """returns a new image of everything drawn on the canvas"""
+        raise GraphicsError("rasterize() needs the headless backend (set GRAPHICS2_BACKEND=headless)")
+
+_BACKENDS = ("tk", "headless")
+
+def _startBackend():
+    """returns the backend to use (see GRAPHICS2_BACKEND above) and its hidden root window"""
+    name = _os.environ.get("GRAPHICS2_BACKEND", "").lower()
+    if name and name not in _BACKENDS:
+        raise GraphicsError("unknown GRAPHICS2_BACKEND {!r} (use one of {})".format(name, _BACKENDS))
+    if name != "headless":
+        if _tk is None:
+            if name == "tk":
+                raise GraphicsError("the tk backend needs tkinter, which isn't installed")
+        else:
+            backend = _TkBackend()
+            try:
+                return backend, backend.start()
+            except _tk.TclError: # e.g. no display
+                if name == "tk":
+                    raise
+    try:
+        import graphics2_headless
+    except ImportError:
+        raise GraphicsError("the headless backend needs graphics2_headless.py (next to graphics2.py)")
+    backend = graphics2_headless.HeadlessBackend(noInputError=GraphicsError)
+    return backend, backend.start()
+
+def getBackend():
+    """Returns the name of the backend graphics2 is using: "tk" or "headless" """
+    return _backend.name
+
 ##########################################################################
 # global variables and funtions
 
-_root = _tk.Tk()
-_root.withdraw()
+_backend, _root = _startBackend()
+
+_openWindows = _weakref.WeakSet() # GraphWins that haven't been closed yet
+
+_windowCreatedCallback = None
+
+def onWindowCreated(func):
+    """Calls func(win) each time a GraphWin is opened (func=None stops this).
+    Lets a test or simulation script the input of a program that opens its
+    own windows, e.g. with win.simulateClick() or win.simulateKey()."""
+    global _windowCreatedCallback
+    _windowCreatedCallback = func
 
 _update_lasttime = _time.time()
 
@@ -271,19 +515,235 @@ def update(rate=None):
 
     _root.update()
 
+############################################################################
+# asyncio support: keeps Tk responsive while coroutines are awaiting
+
+_asyncPumps = _weakref.WeakKeyDictionary() # asyncio event loop -> task pumping Tk events
+_ASYNC_PUMP_INTERVAL = 0.01 # while a coroutine is awaiting a click or key
+_ASYNC_PUMP_IDLE_INTERVAL = 0.05 # while windows are just being shown
+
+async def _pumpTkEvents():
+    # stops once no windows are open (a new GraphWin, mouse(), key() or sleep() restarts it)
+    while _openWindows:
+        try:
+            _root.update()
+        except _backend.Error:
+            return
+        waiting = any(win._mouseWaiters or win._keyWaiters for win in list(_openWindows))
+        await _asyncio.sleep(_ASYNC_PUMP_INTERVAL if waiting else _ASYNC_PUMP_IDLE_INTERVAL)
+
+def _ensureAsyncPump():
+    """makes sure the running asyncio event loop is also processing Tk events"""
+    loop = _asyncio.get_running_loop()
+    task = _asyncPumps.get(loop)
+    if task is None or task.done():
+        _asyncPumps[loop] = loop.create_task(_pumpTkEvents())
+
+def runAsync(coroutine):
+    """Runs the coroutine (e.g. an async main() function) with asyncio, while
+    keeping all graphics windows responsive.  Inside the coroutine you can
+    use  await win.mouse(),  await win.key()  and  await win.sleep(seconds)
+    and run several games/tasks at once with asyncio.gather(...)"""
+    async def runWithPump():
+        _ensureAsyncPump()
+        return await coroutine
+    return _asyncio.run(runWithPump())
+
+############################################################################
+# statistics: the counters behind the getStats() methods
+
+class _Counters:
+
+    """A set of named statistics counters.  (Not thread safe: CommandQueue
+    holds its lock while counting.)"""
+
+    def __init__(self, *names):
+        self._counts = dict.fromkeys(names, 0)
+
+    def add(self, name, amount=1):
+        self._counts[name] += amount
+
+    def raiseTo(self, name, value):
+        """keeps the largest value seen for name"""
+        if value > self._counts[name]:
+            self._counts[name] = value
+
+    def reset(self):
+        self._counts = dict.fromkeys(self._counts, 0)
+
+    def snapshot(self, **extra):
+        """returns a copy of the counts, plus the extra entries (for getStats())"""
+        return dict(self._counts, **extra)
+
+############################################################################
+# thread support: other threads hand their graphics work to the Tk thread
+
+class CommandQueue:
+
+    """Lets other threads (AI players, network input, ...) use graphics2
+    safely.  Tk objects may only be used from the Tk thread, so other threads
+    submit() functions instead; the Tk thread runs them in batches while it
+    processes events (in getMouse(), update(), ...), updating the windows
+    once per batch.  submit() returns a concurrent.futures.Future for the
+    function's result.  At most maxsize commands can be waiting: after that,
+    submit() blocks until the Tk thread catches up (or raises a GraphicsError
+    after timeout seconds), so a fast thread can't run away from the display.
+    The Tk thread only checks for commands (every interval milliseconds)
+    while some are waiting.
+
+        commands = CommandQueue()
+        # ... then on another thread:
+        future = commands.submit(card.flip, win)
+        future.result()  # waits until the Tk thread has flipped the card"""
+
+    def __init__(self, maxsize=1000, batchSize=100, interval=10, timeout=5.0):
+        self.batchSize = batchSize
+        self.interval = interval # milliseconds between checks for new commands
+        self.timeout = timeout # seconds submit() waits for room (None: forever)
+        self._commands = _queue.Queue(maxsize) # (future, function, args, kwargs)
+        self._tkThread = _threading.get_ident() # the queue must be created on the Tk thread
+        self._closed = False
+        self._draining = False
+        self._polling = False # True while the Tk thread is checking for commands
+        self._afterId = None
+        self._stats = _Counters("submitted", "completed", "failed", "cancelled",
+                                "batches", "blockedSubmits", "maxBacklog")
+        self._lock = _threading.Lock() # guards _stats and _polling
+
+    def submit(self, function, *args, **kwargs):
+        """Queues function(*args, **kwargs) to run on the Tk thread and returns
+        a Future for its result.  (Called on the Tk thread itself, the function
+        runs right away.)  Raises a GraphicsError if the queue is closed, or
+        is still full after timeout seconds."""
+        if self._closed:
+            raise GraphicsError("command queue is closed")
+        future = _futures.Future()
+        if _threading.get_ident() == self._tkThread:
+            with self._lock:
+                self._stats.add("submitted")
+            self._run(future, function, args, kwargs)
+            return future
+        command = (future, function, args, kwargs)
+        try:
+            self._commands.put_nowait(command)
+        except _queue.Full:
+            with self._lock:
+                self._stats.add("blockedSubmits")
+            try:
+                self._commands.put(command, timeout=self.timeout)
+            except _queue.Full:
+                raise GraphicsError("command queue is still full after {} seconds".format(self.timeout))
+        if self._closed: # close() may have emptied the queue just before the command went in
+            future.cancel()
+            raise GraphicsError("command queue is closed")
+        with self._lock:
+            self._stats.add("submitted")
+            self._stats.raiseTo("maxBacklog", self._commands.qsize())
+            startPolling = not self._polling
+            self._polling = True
+        if startPolling:
+            self._afterId = _root.after(self.interval, self._drain)
+        return future
+
+    def runPending(self):
+        """Runs all the commands submitted so far (on the Tk thread).  Does
+        nothing when called by one of the commands themselves."""
+        if self._draining:
+            return
+        while not self._commands.empty():
+            self._runBatch()
+
+    def getBacklog(self):
+        """Returns the number of commands waiting to run"""
+        return self._commands.qsize()
+
+    def getStats(self):
+        """Returns a dictionary counting the commands submitted, completed,
+        failed (raised an exception) and cancelled, the batches run, the
+        submits that had to wait for room, and the largest backlog seen"""
+        with self._lock:
+            return self._stats.snapshot(backlog=self._commands.qsize())
+
+    def close(self):
+        """Stops running commands: the ones still waiting are cancelled, and
+        submitting new ones raises a GraphicsError"""
+        self._closed = True
+        if self._afterId is not None:
+            _root.after_cancel(self._afterId)
+            self._afterId = None
+        while True:
+            try:
+                future = self._commands.get_nowait()[0]
+            except _queue.Empty:
+                break
+            if future.cancel():
+                with self._lock:
+                    self._stats.add("cancelled")
+
+    def _run(self, future, function, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            with self._lock:
+                self._stats.add("cancelled")
+            return
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+            with self._lock:
+                self._stats.add("failed")
+        else:
+            future.set_result(result)
+            with self._lock:
+                self._stats.add("completed")
+
+    def _runBatch(self):
+        if self._draining: # a command is updating the windows: don't start another batch inside it
+            return
+        self._draining = True
+        try:
+            with _contextlib.ExitStack() as stack:
+                for win in list(_openWindows):
+                    stack.enter_context(win.batch())
+                for _ in range(self.batchSize):
+                    try:
+                        command = self._commands.get_nowait()
+                    except _queue.Empty:
+                        break
+                    self._run(*command)
+                with self._lock:
+                    self._stats.add("batches")
+        finally:
+            self._draining = False
+
+    def _drain(self):
+        self._afterId = None
+        if self._closed:
+            return
+        if not self._commands.empty():
+            self._runBatch()
+        if self._closed:
+            return
+        with self._lock:
+            if self._commands.empty(): # stop checking until the next submit()
+                self._polling = False
+                return
+        self._afterId = _root.after_idle(self._drain) # more waiting: carry on as soon as Tk is idle
+
 ############################################################################
 # Graphics classes start here
         
-class GraphWin(_tk.Canvas):
+class GraphWin(_backend.Canvas):
 
     """A GraphWin is a toplevel window for displaying graphics."""
 
+    inputBufferSize = 64 # how many unhandled clicks/key presses each window keeps (see inputEvents)
+
     def __init__(self, title="Graphics Window",
                  width=200, height=200, autoflush=True,topLeftX=None,topLeftY=None):
         assert type(title) == type(""), "Title must be a string"
-        master = _tk.Toplevel(_root)
+        master = _backend.Toplevel(_root)
         master.protocol("WM_DELETE_WINDOW", self.close)
-        _tk.Canvas.__init__(self, master, width=width, height=height,
+        _backend.Canvas.__init__(self, master, width=width, height=height,
                            highlightthickness=0, bd=0)
         self.master.title(title)
         self.pack()
@@ -291,7 +751,7 @@ class GraphWin(_tk.Canvas):
         if topLeftX != None and topLeftY != None:
             master.geometry(f"+{topLeftX}+{topLeftY}")
         self.foreground = "black"
-        self.items = []
+        self.items = {} # drawn GraphicsObjects (dict keys, kept in drawing order, for fast removal)
         self.mouseX = None
         self.mouseY = None
         self._mouseMoveX = 0
@@ -304,12 +764,29 @@ class GraphWin(_tk.Canvas):
         self.height = int(height)
         self.width = int(width)
         self.autoflush = autoflush
+        self._batchDepth = 0
+        self._batchStats = _Counters("batches", "updates", "coalescedUpdates")
         self._mouseCallback = None
         self.trans = None
         self.closed = False
         master.lift()
         self.lastKey = ""
+        self.inputEvents = InputBuffer(self.inputBufferSize) # clicks and key presses not handled yet
+        self._inputSignal = _backend.IntVar(_root, 0) # bumped whenever input arrives, so waits can wake up
+        self._mouseWaiters = [] # asyncio futures waiting for the next click/key
+        self._keyWaiters = []
+        self._framebuffer = None # created by the first plot()/plotPixel()
+        self._layers = {} # layer name -> Layer, created by getLayer()
+        self._resources = [] # tk photoimages owned by this window, deleted when it closes
+        self._timers = set() # Timers that haven't run (or been cancelled) yet
+        _openWindows.add(self)
+        try:
+            _ensureAsyncPump() # keeps the window responsive if it was opened by a coroutine
+        except RuntimeError: # no asyncio event loop running
+            pass
         if autoflush: _root.update()
+        if _windowCreatedCallback is not None:
+            _windowCreatedCallback(self)
 
     def __repr__(self):
         try: 
@@ -331,28 +808,115 @@ class GraphWin(_tk.Canvas):
 
     def _onKey(self, evnt):
         self.lastKey = evnt.keysym
+        if self._resolveWaiters(self._keyWaiters, evnt.keysym):
+            self.lastKey = ""
+        else:
+            self.inputEvents._add(InputEvent("key", _clock(), key=evnt.keysym))
+        self._signalInput()
+
+    @staticmethod
+    def _resolveWaiters(waiters, result):
+        """hands result to all waiting asyncio futures; returns True if any were waiting"""
+        delivered = False
+        for future in waiters:
+            if not future.done():
+                future.set_result(result)
+                delivered = True
+        waiters.clear()
+        return delivered
+
+    def _failWaiters(self, message):
+        for future in self._mouseWaiters + self._keyWaiters:
+            if not future.done():
+                future.set_exception(GraphicsError(message))
+        self._mouseWaiters.clear()
+        self._keyWaiters.clear()
+
+    def _signalInput(self):
+        self._inputSignal.set(self._inputSignal.get() + 1)
+
+    def _waitForInput(self, isReady, timeout, methodName):
+        """Runs the Tk event loop (without polling) until isReady() returns True.
+        Returns False if timeout seconds passed first."""
+        timedOut = []
+        def onTimeout():
+            timedOut.append(True)
+            self._signalInput()
+        afterId = None
+        if timeout is not None:
+            afterId = _root.after(max(0, int(timeout * 1000)), onTimeout)
+        try:
+            while not isReady():
+                if self.isClosed(): raise GraphicsError(methodName + " in closed window")
+                if timedOut: return False
+                _root.wait_variable(self._inputSignal)
+        finally:
+            if afterId is not None and not timedOut:
+                _root.after_cancel(afterId)
+        return True
 
 
     def setBackground(self, color):
         """Set background color of the window"""
         self.__checkOpen()
         self.config(bg=color)
-        self.__autoflush()
+        self._autoflush()
         
     def setCoords(self, x1, y1, x2, y2):
         """Set coordinates of window to run from (x1,y1) in the
         lower-left corner to (x2,y2) in the upper-right corner."""
         self.trans = Transform(self.width, self.height, x1, y1, x2, y2)
-        self.redraw()
+        self._reproject()
+
+    def _reproject(self):
+        """moves every drawn item to its screen location under the current
+        coordinates, updating the existing canvas items in place"""
+        if self.closed: return
+        with self.batch():
+            for item in list(self.items):
+                screenCoords = item._screenCoords(self)
+                if screenCoords is None: # unknown kind of item: redraw it
+                    item.undraw()
+                    item.draw(self)
+                else:
+                    self.coords(item.id, *screenCoords)
 
     def close(self):
         """Close the window"""
 
         if self.closed: return
         self.closed = True
+        _openWindows.discard(self)
+        for timer in list(self._timers):
+            timer.cancel()
         self.master.destroy()
-        self.__autoflush()
-
+        self._freeResources()
+        self._signalInput() # wake up anyone waiting for input
+        self._failWaiters("window was closed")
+        self._autoflush()
+
+
+    def _freeResources(self):
+        """lets go of everything that only existed for this (closed) window:
+        the objects still drawn in it (and their Image.imageCache entries)
+        and the images it owned"""
+        items = list(self.items)
+        self.items.clear()
+        for item in items:
+            item._forgetCanvas()
+        for photo in self._resources:
+            try:
+                _backend.deleteImage(photo)
+            except _backend.Error:
+                pass
+        self._resources.clear()
+        self._framebuffer = None
+        self._layers.clear()
+
+    def _addResource(self, photo):
+        """makes photo (a tk photoimage used only by this window) get deleted when the window closes"""
+        self._resources.append(photo)
+        return photo
 
     def isClosed(self):
         return self.closed
@@ -361,58 +925,181 @@ class GraphWin(_tk.Canvas):
         return not self.closed
 
 
-    def __autoflush(self):
+    def _autoflush(self):
         if self.autoflush:
-            _root.update()
+            if self._batchDepth:
+                self._batchStats.add("coalescedUpdates")
+            else:
+                self._batchStats.add("updates")
+                _root.update()
+
+    def batch(self):
+        """Returns a context manager that defers all automatic updates of this
+        window until the end of the with block, and then updates just once:
+
+            with win.batch():
+                for card in cards:
+                    card.draw(win, x, y)
+
+        It can also be used as a decorator:  @win.batch()"""
+        return self._batchContext()
+
+    @_contextlib.contextmanager
+    def _batchContext(self):
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0:
+                self._batchStats.add("batches")
+                if self.autoflush and not self.closed:
+                    self._batchStats.add("updates")
+                    _root.update()
+
+    def getBatchStats(self):
+        """Returns a dictionary counting the batches run in this window, the
+        window updates actually performed, and the updates that were
+        coalesced (skipped) because they happened inside a batch"""
+        return self._batchStats.snapshot()
 
     
     def plot(self, x, y, color="black"):
         """Set pixel (x,y) to the given color"""
         self.__checkOpen()
         xs,ys = self.toScreen(x,y)
-        self.create_line(xs,ys,xs+1,ys, fill=color)
-        self.__autoflush()
+        self.getFramebuffer().setPixel(xs, ys, color)
+        self._autoflush()
         
     def plotPixel(self, x, y, color="black"):
         """Set pixel raw (independent of window coordinates) pixel
         (x,y) to color"""
         self.__checkOpen()
-        self.create_line(x,y,x+1,y, fill=color)
-        self.__autoflush()
+        self.getFramebuffer().setPixel(x, y, color)
+        self._autoflush()
+
+    def getFramebuffer(self):
+        """Returns this window's Framebuffer: a window-sized image (a single
+        canvas item) that plot() and plotPixel() draw their pixels into"""
+        self.__checkOpen()
+        if self._framebuffer is None:
+            self._framebuffer = Framebuffer(self)
+        return self._framebuffer
       
     def flush(self):
         """Update drawing to the window"""
         self.__checkOpen()
         self.update_idletasks()
-        
-    def getMouse(self):
+
+    def rasterize(self):
+        """Returns an (undrawn) Image of everything currently drawn in this
+        window.  Only available with the headless backend, which leaves out
+        text and Entry boxes."""
+        self.__checkOpen()
+        self.update_idletasks() # e.g. pixels the framebuffer hasn't put yet
+        image = Image(Point(*self.toWorld(self.width / 2, self.height / 2)), self.width, self.height)
+        image._setPhotoImage(_backend.rasterize(self))
+        return image
+
+    def simulateClick(self, x, y, delay=0):
+        """Acts as if the user clicked at window coordinates (x,y), delay
+        seconds from now.  Lets tests and simulations play without a user."""
+        screenX, screenY = self.toScreen(x, y)
+        event = _types.SimpleNamespace(x=screenX, y=screenY)
+        def click():
+            if not self.closed:
+                self._onClick(event)
+                self._onClickRelease(event)
+        return self.after(int(delay * 1000), click)
+
+    def simulateKey(self, key, delay=0):
+        """Acts as if the user pressed key (a Tk keysym such as "a" or
+        "Return"), delay seconds from now."""
+        event = _types.SimpleNamespace(keysym=key)
+        def press():
+            if not self.closed:
+                self._onKey(event)
+        return self.after(int(delay * 1000), press)
+
+    def getMouse(self, timeout=None):
         """Wait for mouse click and return Point object representing
-        the click"""
-        self.update()      # flush any prior clicks
-        self.mouseX = None
-        self.mouseY = None
-        while self.mouseX == None or self.mouseY == None:
-            self.update()
-            if self.isClosed(): raise GraphicsError("getMouse in closed window")
-            _time.sleep(.1) # give up thread
-        x,y = self.toWorld(self.mouseX, self.mouseY)
-        self.mouseX = None
-        self.mouseY = None
-        return Point(x,y)
+        the click.  Clicks are buffered (see inputEvents), so this is the
+        oldest click not handled yet, even if it happened before the call.
+        If timeout (in seconds) is given and no click happens in that
+        time, returns None instead."""
+        self.update()      # pick up clicks Tk hasn't handed over yet
+        if not self._waitForInput(lambda: self.inputEvents.count("click") > 0, timeout, "getMouse"):
+            return None
+        return self.inputEvents.pop("click").point
+
+    async def mouse(self):
+        """Awaitable version of getMouse(): waits (without blocking other asyncio
+        tasks) for a mouse click and returns a Point object representing the click"""
+        self.__checkOpen()
+        event = self.inputEvents.pop("click")
+        if event is not None:
+            return event.point
+        future = _asyncio.get_running_loop().create_future()
+        self._mouseWaiters.append(future)
+        _ensureAsyncPump()
+        return await future
+
+    async def key(self):
+        """Awaitable version of getKey(): waits (without blocking other asyncio
+        tasks) for a key press and returns it as a string"""
+        self.__checkOpen()
+        event = self.inputEvents.pop("key")
+        if event is not None:
+            return event.key
+        future = _asyncio.get_running_loop().create_future()
+        self._keyWaiters.append(future)
+        _ensureAsyncPump()
+        return await future
+
+    async def sleep(self, seconds):
+        """Awaitable pause that keeps this window (and other asyncio tasks) running"""
+        self.__checkOpen()
+        _ensureAsyncPump()
+        await _asyncio.sleep(seconds)
+
+    def schedule(self, delay, function, *args):
+        """Runs function(*args) once, delay seconds from now.  It's run by
+        Tk's event loop, so the window stays responsive in the meantime
+        (timers run while getMouse(), pause(), update(), ... process events).
+        Returns a Timer, whose cancel() method unschedules it."""
+        self.__checkOpen()
+        return Timer(self, delay, function, args)
+
+    def scheduleRepeating(self, interval, function, *args):
+        """Runs function(*args) every interval seconds, until the returned
+        Timer is cancelled or the window is closed"""
+        self.__checkOpen()
+        return Timer(self, interval, function, args, repeating=True)
+
+    def pause(self, seconds):
+        """Waits for the given number of seconds, but unlike time.sleep()
+        keeps the window repainting and running timers meanwhile.  Returns
+        early if the window gets closed."""
+        self.__checkOpen()
+        done = []
+        def finish():
+            done.append(True)
+            self._signalInput()
+        timer = self.schedule(seconds, finish)
+        try:
+            while not done and not self.closed:
+                _root.wait_variable(self._inputSignal)
+        finally:
+            timer.cancel()
 
     def checkMouse(self):
-        """Return last mouse click or None if mouse has
-        not been clicked since last call"""
+        """Return the oldest mouse click not handled yet, or None
+        if there isn't one"""
         if self.isClosed():
             raise GraphicsError("checkMouse in closed window")
         self.update()
-        if self.mouseX != None and self.mouseY != None:
-            x,y = self.toWorld(self.mouseX, self.mouseY)
-            self.mouseX = None
-            self.mouseY = None
-            return Point(x,y)
-        else:
-            return None
+        event = self.inputEvents.pop("click")
+        return event.point if event is not None else None
 
     def checkMousePointer(self):
         """Return point where the mouse pointer is currently at.
@@ -429,26 +1116,22 @@ class GraphWin(_tk.Canvas):
         self.update()
         return self._isMouseDown
 
-    def getKey(self):
-        """Wait for user to press a key and return it as a string."""
-        self.lastKey = ""
-        while self.lastKey == "":
-            self.update()
-            if self.isClosed(): raise GraphicsError("getKey in closed window")
-            _time.sleep(.1) # give up thread
-
-        key = self.lastKey
-        self.lastKey = ""
-        return key
+    def getKey(self, timeout=None):
+        """Wait for user to press a key and return it as a string
+        (the oldest key press not handled yet, see inputEvents).
+        If timeout (in seconds) is given and no key is pressed in
+        that time, returns "" instead."""
+        if not self._waitForInput(lambda: self.inputEvents.count("key") > 0, timeout, "getKey"):
+            return ""
+        return self.inputEvents.pop("key").key
 
     def checkKey(self):
-        """Return last key pressed or None if no key pressed since last call"""
+        """Return the oldest key press not handled yet, or "" if there isn't one"""
         if self.isClosed():
             raise GraphicsError("checkKey in closed window")
         self.update()
-        key = self.lastKey
-        self.lastKey = ""
-        return key
+        event = self.inputEvents.pop("key")
+        return event.key if event is not None else ""
             
     def getHeight(self):
         """Return the height of the window"""
@@ -460,8 +1143,16 @@ class GraphWin(_tk.Canvas):
 
     def clear(self):
         """Undraws everything in this window"""
-        for item in self.items.copy():
-            item.undraw()
+        if self._framebuffer is not None:
+            self._framebuffer.clear()
+        items = list(self.items)
+        if not items: return
+        if not self.closed:
+            self.delete(*[item.id for item in items]) # one Tk call for everything
+        self.items.clear()
+        for item in items:
+            item._forgetCanvas()
+        self._autoflush()
 
     def setTitle(self,newTitle):
         """changes the window's title to newTitle"""
@@ -483,6 +1174,16 @@ class GraphWin(_tk.Canvas):
             return self.trans.world(x,y)
         else:
             return x,y
+
+    def toScreenMany(self, xs, ys):
+        """converts all the points (xs[i],ys[i]) to screen coordinates at once,
+        returning them as one flat list [x0,y0,x1,y1,...]"""
+        if self.trans:
+            return self.trans.screenMany(xs, ys)
+        flat = [0] * (2 * len(xs))
+        flat[0::2] = xs
+        flat[1::2] = ys
+        return flat
         
     def setMouseHandler(self, func):
         self._mouseCallback = func
@@ -493,6 +1194,13 @@ class GraphWin(_tk.Canvas):
         self._isMouseDown = True
         if self._mouseCallback:
             self._mouseCallback(Point(e.x, e.y))
+        point = Point(*self.toWorld(e.x, e.y))
+        if self._mouseWaiters and self._resolveWaiters(self._mouseWaiters, point):
+            self.mouseX = None
+            self.mouseY = None
+        else:
+            self.inputEvents._add(InputEvent("click", _clock(), e.x, e.y, point))
+        self._signalInput()
 
     def _onClickRelease(self, _):
         self._isMouseDown = False
@@ -501,18 +1209,289 @@ class GraphWin(_tk.Canvas):
         self._mouseMoveX = e.x
         self._mouseMoveY = e.y
 
+    layerNames = ("background", "board", "hud") # bottom to top
+
+    def getLayer(self, name):
+        """Returns the Layer of this window with the given name (one of
+        GraphWin.layerNames).  Objects in a layer always appear above
+        those in lower layers, no matter in what order they were drawn."""
+        if name not in self.layerNames:
+            raise GraphicsError("unknown layer {!r} (use one of {})".format(name, self.layerNames))
+        if not self._layers:
+            # invisible marker items separate the layers: each layer's items
+            # are stacked just below the layer's own marker
+            self.create_line(0, 0, 0, 0, state="hidden", tags=("layermarker",))
+            for layerName in self.layerNames:
+                self.create_line(0, 0, 0, 0, state="hidden", tags=("layermarker", Layer._markerTag(layerName)))
+            for layerName in self.layerNames:
+                self._layers[layerName] = Layer(self, layerName)
+        return self._layers[name]
+
     def addItem(self, item):
-        self.items.append(item)
+        self.items[item] = None
 
     def delItem(self, item):
-        self.items.remove(item)
+        self.items.pop(item, None)
 
     def redraw(self):
-        for item in self.items[:]:
+        for item in list(self.items):
             item.undraw()
             item.draw(self)
         self.update()
         
+
+
+def _clock():
+    """the time input events are stamped with (the headless backend's clock
+    skips ahead while waiting for timers)"""
+    return _backend.now()
+
+
+class InputEvent:
+
+    """A mouse click (kind "click") or key press (kind "key") received by a
+    GraphWin, with the time it arrived.  Clicks have the window coordinates
+    x,y and the Point (in the window's coordinate system) that was clicked;
+    key presses have the key."""
+
+    __slots__ = ("kind", "time", "x", "y", "point", "key")
+
+    def __init__(self, kind, time, x=None, y=None, point=None, key=None):
+        self.kind = kind
+        self.time = time
+        self.x = x
+        self.y = y
+        self.point = point
+        self.key = key
+
+    def __repr__(self):
+        detail = self.point if self.kind == "click" else repr(self.key)
+        return "InputEvent({!r}, {:.3f}, {})".format(self.kind, self.time, detail)
+
+
+class InputBuffer:
+
+    """The input events a window has received but not handled yet, oldest
+    first (see GraphWin.inputEvents).  getMouse(), getKey(), ... take their
+    events from here.  When the buffer is full, the oldest event is dropped
+    to make room, and counted in the statistics."""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._events = _collections.deque()
+        self._stats = _Counters("received", "handled", "dropped")
+
+    def __len__(self):
+        return len(self._events)
+
+    def _add(self, event):
+        if len(self._events) >= self.capacity:
+            self._events.popleft()
+            self._stats.add("dropped")
+        self._events.append(event)
+        self._stats.add("received")
+
+    def count(self, kind=None):
+        """Returns the number of buffered events (of the given kind)"""
+        if kind is None:
+            return len(self._events)
+        return sum(1 for event in self._events if event.kind == kind)
+
+    def peek(self, kind=None):
+        """Returns a list of the buffered events (of the given kind), leaving them in the buffer"""
+        return [event for event in self._events if kind is None or event.kind == kind]
+
+    def pop(self, kind=None):
+        """Removes and returns the oldest buffered event (of the given kind), or None"""
+        for event in self._events:
+            if kind is None or event.kind == kind:
+                self._events.remove(event)
+                self._stats.add("handled")
+                return event
+        return None
+
+    def drain(self, kind=None):
+        """Removes and returns all the buffered events (of the given kind), oldest first"""
+        drained = self.peek(kind)
+        if kind is None:
+            self._events.clear()
+        else:
+            self._events = _collections.deque(event for event in self._events if event.kind != kind)
+        self._stats.add("handled", len(drained))
+        return drained
+
+    def clear(self):
+        """Throws away all the buffered events (without counting them as handled or dropped)"""
+        self._events.clear()
+
+    def getStats(self):
+        """Returns a dictionary counting the events received, handled (popped
+        or drained) and dropped because the buffer was full, with the number
+        currently buffered and the capacity"""
+        return self._stats.snapshot(buffered=len(self._events), capacity=self.capacity)
+
+
+class Timer:
+
+    """A function scheduled to run later (or repeatedly) in a window's event
+    loop; returned by GraphWin.schedule() and scheduleRepeating()"""
+
+    def __init__(self, win, delay, function, args=(), repeating=False):
+        self.win = win
+        self.delay = delay
+        self.function = function
+        self.args = args
+        self.repeating = repeating
+        self.runs = 0
+        self._afterId = None
+        self._start()
+
+    def __repr__(self):
+        state = "active" if self.isActive() else "inactive"
+        return "Timer({!r}, {}, {})".format(self.function, self.delay, state)
+
+    def _start(self):
+        self._afterId = self.win.after(max(0, int(round(self.delay * 1000))), self._fire)
+        self.win._timers.add(self)
+
+    def _fire(self):
+        self._afterId = None
+        self.win._timers.discard(self)
+        if self.repeating and not self.win.isClosed():
+            self._start() # before calling the function, so it can cancel the timer
+        self.runs += 1
+        self.function(*self.args)
+
+    def isActive(self):
+        """Returns True if the function is still going to run"""
+        return self._afterId is not None
+
+    def cancel(self):
+        """Unschedules the function; returns True if it was still going to run"""
+        if self._afterId is None:
+            return False
+        self.win.after_cancel(self._afterId)
+        self._afterId = None
+        self.win._timers.discard(self)
+        return True
+
+                      
+def batched(func):
+    """Decorator: while the decorated function runs, drawing in any GraphWin
+    passed to it as an argument is batched (see GraphWin.batch())."""
+    @_functools.wraps(func)
+    def batchedFunc(*args, **kwargs):
+        with _contextlib.ExitStack() as stack:
+            for arg in args + tuple(kwargs.values()):
+                if isinstance(arg, GraphWin):
+                    stack.enter_context(arg.batch())
+            return func(*args, **kwargs)
+    return batchedFunc
+
+
+class Framebuffer:
+
+    """A window-sized PhotoImage, shown as one canvas item, for drawing
+    individual pixels (see GraphWin.getFramebuffer()).  Pixels are
+    collected and written to the image in as few Tk calls as possible
+    when the window next updates (or when flush() is called)."""
+
+    def __init__(self, win):
+        self.win = win
+        self.img = win._addResource(_backend.newImage(win.getWidth(), win.getHeight(), master=win))
+        self.id = win.create_image(0, 0, image=self.img, anchor="nw")
+        self._pending = {} # (x,y) -> color, waiting to be written
+        self._dirty = None # [x1, y1, x2, y2] bounding the pending pixels
+        self._flushScheduled = False
+        self._stats = _Counters("pixels", "blits", "flushes", "puts")
+
+    def setPixel(self, x, y, color):
+        """Sets raw (window) pixel (x,y) to color; pixels outside the window are ignored"""
+        x, y = int(x), int(y)
+        if not (0 <= x < self.win.getWidth() and 0 <= y < self.win.getHeight()):
+            return
+        self._pending[x, y] = color
+        self._stats.add("pixels")
+        dirty = self._dirty
+        if dirty is None:
+            self._dirty = [x, y, x + 1, y + 1]
+            self._scheduleFlush()
+        else:
+            if x < dirty[0]: dirty[0] = x
+            elif x >= dirty[2]: dirty[2] = x + 1
+            if y < dirty[1]: dirty[1] = y
+            elif y >= dirty[3]: dirty[3] = y + 1
+
+    def blit(self, x, y, width, height, pixels):
+        """Copies a whole rectangle of pixels into the framebuffer at (x,y) with
+        one Tk call.  pixels holds 3 bytes (r,g,b) per pixel, row by row, as
+        bytes, bytearray, memoryview or a NumPy array of shape (height, width, 3)."""
+        if _numpy is not None and isinstance(pixels, _numpy.ndarray):
+            pixels = _numpy.ascontiguousarray(pixels, dtype=_numpy.uint8).tobytes()
+        rgb = bytes(pixels)
+        if len(rgb) != width * height * 3:
+            raise GraphicsError("blit needs exactly 3 bytes for each pixel in the rectangle")
+        if x < 0 or y < 0 or x + width > self.win.getWidth() or y + height > self.win.getHeight():
+            raise GraphicsError("blit rectangle doesn't fit in the window")
+        self.flush() # so earlier setPixel()s don't get written on top of this
+        _backend.putRGB(self.img, x, y, width, height, rgb)
+        self.win.tag_raise(self.id) # new pixels go on top, like any newly drawn object
+        self._stats.add("blits")
+        self.win._autoflush()
+
+    def getDirtyRegion(self):
+        """Returns the rectangle (x1, y1, x2, y2) of pixels waiting to be
+        written to the image, or None if there aren't any"""
+        return None if self._dirty is None else tuple(self._dirty)
+
+    def _scheduleFlush(self):
+        if not self._flushScheduled:
+            self._flushScheduled = True
+            self.win.after_idle(self._flushWhenIdle)
+
+    def _flushWhenIdle(self):
+        self._flushScheduled = False
+        if not self.win.isClosed():
+            self.flush()
+
+    def flush(self):
+        """Writes the pending pixels into the image.  A completely filled dirty
+        rectangle is written with one Tk call, otherwise one call per run
+        of neighboring pixels in a row."""
+        if self._dirty is None:
+            return
+        pending, (x1, y1, x2, y2) = self._pending, self._dirty
+        self._pending = {}
+        self._dirty = None
+        self._stats.add("flushes")
+        self.win.tag_raise(self.id) # new pixels go on top, like any newly drawn object
+        if len(pending) == (x2 - x1) * (y2 - y1):
+            rows = [[pending[x, y] for x in range(x1, x2)] for y in range(y1, y2)]
+            _backend.putColors(self.img, x1, y1, rows)
+            self._stats.add("puts")
+            return
+        runs = {} # (first x of run, y) -> list of colors
+        run, lastX, lastY = None, None, None
+        for (x, y) in sorted(pending, key=lambda xy: (xy[1], xy[0])):
+            if y != lastY or x != lastX + 1:
+                run = runs[x, y] = []
+            run.append(pending[x, y])
+            lastX, lastY = x, y
+        for (x, y), colors in runs.items():
+            _backend.putColors(self.img, x, y, [colors])
+        self._stats.add("puts", len(runs))
+
+    def clear(self):
+        """Erases all the pixels (making the framebuffer transparent again)"""
+        self._pending = {}
+        self._dirty = None
+        self.img.blank()
+        self.win._autoflush()
+
+    def getStats(self):
+        """Returns a dictionary counting pixels set, blits, flushes and the Tk put calls they needed"""
+        return self._stats.snapshot()
+
                       
 class Transform:
 
@@ -541,10 +1520,46 @@ class Transform:
         y = self.ybase - ys*self.yscale
         return x,y
 
+    def screenMany(self, xs, ys):
+        # Returns the screen coordinates of all the points (xs[i],ys[i]) as one
+        # flat list [x0,y0,x1,y1,...] (the way canvas.coords() wants them)
+        return _transformMany(xs, ys, self.xbase, self.xscale, self.ybase, self.yscale, True)
+
+    def worldMany(self, xs, ys):
+        # Returns the world coordinates of all the screen points (xs[i],ys[i])
+        # as a pair of lists (worldXs, worldYs)
+        flat = _transformMany(xs, ys, self.xbase, 1 / self.xscale, self.ybase, 1 / self.yscale, False)
+        return flat[0::2], flat[1::2]
+
+_VECTORIZE_MIN_POINTS = 64 # below this many points, plain Python is faster than NumPy
+
+def _transformMany(xs, ys, xbase, xscale, ybase, yscale, toScreen):
+    """helper for Transform.screenMany/worldMany: x' = (x-xbase)/xscale and
+    y' = (ybase-y)/yscale (rounded to ints if toScreen), or the inverse"""
+    if _numpy is not None and len(xs) >= _VECTORIZE_MIN_POINTS:
+        xs = _numpy.asarray(xs, dtype=float)
+        ys = _numpy.asarray(ys, dtype=float)
+        flat = _numpy.empty(2 * len(xs))
+        if toScreen:
+            flat[0::2] = _numpy.trunc((xs - xbase) / xscale + 0.5)
+            flat[1::2] = _numpy.trunc((ybase - ys) / yscale + 0.5)
+            return flat.astype(int).tolist()
+        flat[0::2] = xs / xscale + xbase
+        flat[1::2] = ybase - ys / yscale
+        return flat.tolist()
+    flat = [0] * (2 * len(xs))
+    if toScreen:
+        flat[0::2] = [int((x - xbase) / xscale + 0.5) for x in xs]
+        flat[1::2] = [int((ybase - y) / yscale + 0.5) for y in ys]
+    else:
+        flat[0::2] = [x / xscale + xbase for x in xs]
+        flat[1::2] = [ybase - y / yscale for y in ys]
+    return flat
+
 #For some reason, tkinter scales the font differently (points to pixels) on HiDPI machines
 #and we need to adjust for that.
 try:
-    _HIDPI_FONT_SCALING_RATIO = 100.0 / _tk.font.Font(family="Courier",size=100,weight="normal").measure('A')
+    _HIDPI_FONT_SCALING_RATIO = 100.0 / _backend.font(family="Courier",size=100,weight="normal").measure('A')
 except:
     _HIDPI_FONT_SCALING_RATIO = 1.0
 
@@ -572,6 +1587,9 @@ class GraphicsObject:
     """Generic base class for all of the drawable objects"""
     # A subclass of GraphicsObject should override methods
     #  _draw, _move, _scale, and getCenter()
+
+    _groupTags = () # canvas tags of the Groups this object belongs to
+    _layer = None # the Layer this object belongs to (if any)
     
     def __init__(self, options):
         # options is a list of strings indicating which options are
@@ -632,10 +1650,14 @@ class GraphicsObject:
         if self.canvas and not self.canvas.isClosed(): raise GraphicsError(_OBJ_ALREADY_DRAWN)
         if graphwin.isClosed(): raise GraphicsError("Can't draw to closed window")
         self.canvas = graphwin
-        self.id = self._draw(graphwin, self.config)
+        options = self.config
+        if self._groupTags:
+            options = dict(options, tags=self._groupTags)
+        self.id = self._draw(graphwin, options)
+        if self._layer is not None and self._layer.win is graphwin:
+            self._layer._place(self)
         graphwin.addItem(self)
-        if graphwin.autoflush:
-            _root.update()
+        graphwin._autoflush()
         return self
 
             
@@ -648,10 +1670,15 @@ class GraphicsObject:
         if not self.canvas.isClosed():
             self.canvas.delete(self.id)
             self.canvas.delItem(self)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
+        self._forgetCanvas()
+
+    def _forgetCanvas(self):
+        """forgets the window this object was drawn in (after its canvas item is gone)"""
         self.canvas = None
         self.id = None
+        if self._layer is not None:
+            self._layer.members.pop(self, None) # (it is put back if it's drawn again)
 
 
     def move(self, dx, dy):
@@ -670,8 +1697,7 @@ class GraphicsObject:
                 x = dx
                 y = dy
             self.canvas.move(self.id, x, y)
-            if canvas.autoflush:
-                _root.update()
+            canvas._autoflush()
 
     def setShapeSize(self, newShapeWidth, newShapeHeight=None):
         """scales this graphics object to match newShapeWidth and newShapeHeight.
@@ -708,8 +1734,7 @@ class GraphicsObject:
         self._scale(scalingFactorX,scalingFactorY)
             
         if canvas and not canvas.isClosed():
-            if canvas.autoflush:
-                _root.update()
+            canvas._autoflush()
 
     def flipHorizontal(self):
         """ flips this shape horizontally (mirror image)"""
@@ -736,8 +1761,7 @@ class GraphicsObject:
         options[option] = setting
         if self.canvas and not self.canvas.isClosed():
             self.canvas.itemconfig(self.id, options)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
 
 
     def _draw(self, canvas, options):
@@ -745,6 +1769,12 @@ class GraphicsObject:
         Returns Tk id of item drawn"""
         raise NotImplementedError("must override _draw in subclasses")
 
+    def _screenCoords(self, canvas):
+        """returns the list of screen coordinates for this object's canvas item
+        (as used when the window coordinates change), or None if the object
+        needs to be redrawn instead"""
+        return None
+
     def _move(self, dx, dy):
         """updates internal state of object to move it dx,dy units"""
         raise NotImplementedError("must override _move in subclasses")
@@ -775,6 +1805,69 @@ class GraphicsObject:
         """returns a Point representing the center location of this shape"""
         raise NotImplementedError("must override getCenter in subclasses")
 
+    def getCenterVec(self):
+        """returns the center location of this shape as a (lightweight) Vec2"""
+        center = self.getCenter()
+        return self._vecAt(center.x, center.y)
+
+    _lastVec = None
+
+    def _vecAt(self, x, y):
+        """returns a Vec2 for (x,y), reusing the last one this object made if it
+        is for the same location (Vec2s are immutable, so sharing is safe)"""
+        vec = self._lastVec
+        if vec is None or vec.x != x or vec.y != y:
+            vec = self._lastVec = Vec2(x, y)
+        return vec
+
+
+class Vec2:
+
+    """A lightweight, immutable (x,y) location/vector, for geometry and
+    hit-testing where creating full Point objects would be wasteful.
+    (Vec2s can't be drawn: use toPoint() for that.)"""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        object.__setattr__(self, "x", float(x))
+        object.__setattr__(self, "y", float(y))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Vec2 objects can't be changed")
+
+    def __repr__(self):
+        return "Vec2({}, {})".format(self.x, self.y)
+
+    def __eq__(self, other):
+        return isinstance(other, Vec2) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __add__(self, other):
+        return Vec2(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return Vec2(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, factor):
+        return Vec2(self.x * factor, self.y * factor)
+
+    def getX(self): return self.x
+    def getY(self): return self.y
+
+    def clone(self):
+        return self # immutable, so sharing is safe
+
+    def toPoint(self):
+        """returns a (drawable) Point at this location"""
+        return Point(self.x, self.y)
+
          
 class Point(GraphicsObject):
     def __init__(self, x, y):
@@ -790,8 +1883,11 @@ class Point(GraphicsObject):
             return "Uninitialized Point"
         
     def _draw(self, canvas, options):
+        return canvas.create_rectangle(*self._screenCoords(canvas),options)
+
+    def _screenCoords(self, canvas):
         x,y = canvas.toScreen(self.x,self.y)
-        return canvas.create_rectangle(x,y,x+1,y+1,options)
+        return [x,y,x+1,y+1]
         
     def _move(self, dx, dy):
         self.x = self.x + dx
@@ -836,6 +1932,13 @@ class Point(GraphicsObject):
     
     def getCenter(self):
         return Point(self.x,self.y)
+
+    def getCenterVec(self):
+        return self._vecAt(self.x,self.y)
+
+    def toVec(self):
+        """returns this point's location as a (lightweight, immutable) Vec2"""
+        return self._vecAt(self.x,self.y)
     
 class _BBox(GraphicsObject):
     # Internal base class for objects represented by bounding box
@@ -856,6 +1959,10 @@ class _BBox(GraphicsObject):
 
     def getP2(self): return self.p2.clone()
 
+    def getP1Vec(self): return self.p1.toVec()
+
+    def getP2Vec(self): return self.p2.toVec()
+
     def setP1(self,newP1):
         """ changes the location of point P1
             Param: newP1 (Point) new location"""
@@ -868,19 +1975,26 @@ class _BBox(GraphicsObject):
         self.p2 = Point(newP2.x,newP2.y)
         self._updatePointsOnCanvas()
         
+    def _screenCoords(self, canvas):
+        x1,y1 = canvas.toScreen(self.p1.x,self.p1.y)
+        x2,y2 = canvas.toScreen(self.p2.x,self.p2.y)
+        return [x1,y1,x2,y2]
+
     def _updatePointsOnCanvas(self):
         if self.canvas and not self.canvas.isClosed():
-            x1,y1 = self.canvas.toScreen(self.p1.x,self.p1.y)
-            x2,y2 = self.canvas.toScreen(self.p2.x,self.p2.y)
-            self.canvas.coords(self.id, x1, y1, x2, y2)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas.coords(self.id, *self._screenCoords(self.canvas))
+            self.canvas._autoflush()
         
     def getCenter(self):
         p1 = self.p1
         p2 = self.p2
         return Point((p1.x+p2.x)/2.0, (p1.y+p2.y)/2.0)
 
+    def getCenterVec(self):
+        p1 = self.p1
+        p2 = self.p2
+        return self._vecAt((p1.x+p2.x)/2.0, (p1.y+p2.y)/2.0)
+
     def getShapeWidth(self):
         return abs(self.p2.x - self.p1.x)
     
@@ -1033,32 +2147,47 @@ class Polygon(GraphicsObject):
         # if points passed as a list, extract it
         if len(points) == 1 and type(points[0]) == type([]):
             points = points[0]
-        self.points = list(map(Point.clone, points))
+        # the vertices are stored as two compact arrays of x and y values
+        self._xs = _array.array("d", [p.x for p in points])
+        self._ys = _array.array("d", [p.y for p in points])
+        self._bounds = None # cached (xMin,yMin,xMax,yMax), cleared whenever the vertices change
         GraphicsObject.__init__(self, ["outline", "width", "fill"])
 
     def __repr__(self):
         try:
-            return "Polygon"+str(tuple(p for p in self.points))
+            return "Polygon"+str(tuple(self.points))
         except:
             return "Uninitialized Polygon"
         
     def clone(self):
-        other = Polygon(*self.points)
+        other = Polygon()
+        other._xs = _array.array("d", self._xs)
+        other._ys = _array.array("d", self._ys)
+        other._bounds = self._bounds
         other.config = self.config.copy()
         return other
 
+    @property
+    def points(self):
+        """the vertices of this polygon, as a new list of Points"""
+        return self.getPoints()
+
+    @points.setter
+    def points(self, points):
+        self._setVertices([p.x for p in points], [p.y for p in points])
+
     def getPoints(self):
-        return list(map(Point.clone, self.points))
+        return [Point(x,y) for x,y in zip(self._xs, self._ys)]
+
+    def _setVertices(self, xs, ys):
+        self._xs = _array.array("d", xs)
+        self._ys = _array.array("d", ys)
+        self._bounds = None
 
     def _getBoundingCoords(self):
-        xMin = xMax = self.points[0].x
-        yMin = yMax = self.points[0].y
-        for p in self.points[1:]:
-            xMin = min(xMin,p.x)
-            xMax = max(xMax,p.x)
-            yMin = min(yMin,p.y)
-            yMax = max(yMax,p.y)
-        return xMin,yMin,xMax,yMax
+        if self._bounds is None:
+            self._bounds = (min(self._xs), min(self._ys), max(self._xs), max(self._ys))
+        return self._bounds
     
     def getBoundingRectangle(self):
         """returns the smallest Rectangle that fully contains this polygon"""
@@ -1070,6 +2199,10 @@ class Polygon(GraphicsObject):
         xMin,yMin,xMax,yMax = self._getBoundingCoords()
         return Point((xMin+xMax)/2,(yMin+yMax)/2)
 
+    def getCenterVec(self):
+        xMin,yMin,xMax,yMax = self._getBoundingCoords()
+        return self._vecAt((xMin+xMax)/2,(yMin+yMax)/2)
+
     def getShapeWidth(self):
         xMin,_,xMax,_ = self._getBoundingCoords()
         return xMax-xMin
@@ -1079,37 +2212,26 @@ class Polygon(GraphicsObject):
         return yMax-yMin
 
     def _move(self, dx, dy):
-        for p in self.points:
-            p.move(dx,dy)
+        bounds = self._bounds
+        self._setVertices([x + dx for x in self._xs], [y + dy for y in self._ys])
+        if bounds is not None: # moving doesn't change the shape, so the bounds just move too
+            self._bounds = (bounds[0] + dx, bounds[1] + dy, bounds[2] + dx, bounds[3] + dy)
    
     def _draw(self, canvas, options):
-        args = [canvas]
-        for p in self.points:
-            x,y = canvas.toScreen(p.x,p.y)
-            args.append(x)
-            args.append(y)
-        args.append(options)
-        return GraphWin.create_polygon(*args) 
+        return GraphWin.create_polygon(canvas, self._screenCoords(canvas), options)
+
+    def _screenCoords(self, canvas):
+        return canvas.toScreenMany(self._xs, self._ys)
 
     def _updateScreenPoints(self):
-        newPointCoords = []
-        for p in self.points:
-            xScreen,yScreen = self.canvas.toScreen(p.x,p.y)
-            newPointCoords.extend([xScreen,yScreen])
-        self.canvas.coords(self.id, newPointCoords)
+        self.canvas.coords(self.id, self._screenCoords(self.canvas))
         
     def _scale(self,scalingFactorX,scalingFactorY):
         """ Resizes the polygon by the given scaling factors."""
-        cPt = self.getCenter()
-        cx,cy = cPt.x,cPt.y
-        newPoints = []
-        
-        for p in self.points:
-            newPx = cx + (p.x - cx) * scalingFactorX
-            newPy = cy + (p.y - cy) * scalingFactorY
-            newPoints.append(Point(newPx,newPy))
-
-        self.points = newPoints
+        xMin,yMin,xMax,yMax = self._getBoundingCoords()
+        cx,cy = (xMin+xMax)/2,(yMin+yMax)/2
+        self._setVertices([cx + (x - cx) * scalingFactorX for x in self._xs],
+                          [cy + (y - cy) * scalingFactorY for y in self._ys])
 
         if self.canvas and not self.canvas.isClosed():
             self._updateScreenPoints()
@@ -1118,22 +2240,16 @@ class Polygon(GraphicsObject):
         """ rotates the polygon by the given angle around its center point
             (positive goes clockwise, negative counter-clockwise)"""
         angleInRadians = _math.radians(angleInDegrees)
-        centerPt = self.getCenter()
-        cx,cy = centerPt.x,centerPt.y
-        newPoints = []
-        
-        for p in self.points:
-            r = _math.sqrt((p.x - cx) ** 2 + (p.y-cy)**2)
-            theta = _math.atan2(p.y-cy,p.x-cx) + angleInRadians
-            newPx = cx + r * _math.cos(theta)
-            newPy = cy + r * _math.sin(theta)
-            newPoints.append(Point(newPx,newPy))
+        cos, sin = _math.cos(angleInRadians), _math.sin(angleInRadians)
+        xMin,yMin,xMax,yMax = self._getBoundingCoords()
+        cx,cy = (xMin+xMax)/2,(yMin+yMax)/2
+        xs, ys = self._xs, self._ys
+        self._setVertices([cx + (x - cx) * cos - (y - cy) * sin for x, y in zip(xs, ys)],
+                          [cy + (x - cx) * sin + (y - cy) * cos for x, y in zip(xs, ys)])
         
-        self.points = newPoints
         if self.canvas and not self.canvas.isClosed():
             self._updateScreenPoints()
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
 
 class Text(GraphicsObject):
     
@@ -1157,6 +2273,9 @@ class Text(GraphicsObject):
         
     def _move(self, dx, dy):
         self.anchor.move(dx,dy)
+
+    def _screenCoords(self, canvas):
+        return list(canvas.toScreen(self.anchor.x,self.anchor.y))
         
     def clone(self):
         other = Text(self.anchor, self.config['text'])
@@ -1175,6 +2294,9 @@ class Text(GraphicsObject):
     def getCenter(self):
         return self.getAnchor()
 
+    def getCenterVec(self):
+        return self.anchor.toVec()
+
     def setFace(self, face):
         if face in ['helvetica','arial','courier','times roman']:
             _,s,b = self.config['font']
@@ -1222,7 +2344,7 @@ class Entry(GraphicsObject):
         self.anchor = p.clone()
         #print self.anchor
         self.width = width
-        self.text = _tk.StringVar(_root)
+        self.text = _backend.StringVar(_root)
         self.text.set("")
         self.fill = "gray"
         self.color = "black"
@@ -1238,8 +2360,8 @@ class Entry(GraphicsObject):
     def _draw(self, canvas, options):
         p = self.anchor
         x,y = canvas.toScreen(p.x,p.y)
-        frm = _tk.Frame(canvas.master)
-        self.entry = _tk.Entry(frm,
+        frm = _backend.Frame(canvas.master)
+        self.entry = _backend.Entry(frm,
                               width=self.width,
                               textvariable=self.text,
                               bg = self.fill,
@@ -1248,7 +2370,7 @@ class Entry(GraphicsObject):
         self.entry.pack()
         #self.setFill(self.fill)
         self.entry.focus_set()
-        return canvas.create_window(x,y,window=frm)
+        return canvas.create_window(x,y,options,window=frm)
 
     def getText(self):
         return self.text.get()
@@ -1256,16 +2378,22 @@ class Entry(GraphicsObject):
     def _move(self, dx, dy):
         self.anchor.move(dx,dy)
 
+    def _screenCoords(self, canvas):
+        return list(canvas.toScreen(self.anchor.x,self.anchor.y))
+
     def getAnchor(self):
         return self.anchor.clone()
 
     def getCenter(self):
         return self.getAnchor()
 
+    def getCenterVec(self):
+        return self.anchor.toVec()
+
     def clone(self):
         other = Entry(self.anchor, self.width)
         other.config = self.config.copy()
-        other.text = _tk.StringVar()
+        other.text = _backend.StringVar()
         other.text.set(self.text.get())
         other.fill = self.fill
         return other
@@ -1312,35 +2440,723 @@ class Entry(GraphicsObject):
     def _scale(self,scalingFactorX,scalingFactorY):
         raise GraphicsError("Cannot scale an Entry object - use setSize(...) to change font size instead.")
 
+class Group:
+
+    """A collection of graphics objects that can be drawn, undrawn,
+    moved, restacked and recolored together.  The objects' canvas
+    items share a tag, so (once drawn) each of these operations on
+    the whole group is a single Tk call."""
+
+    _count = 0
+
+    def __init__(self, *objects):
+        Group._count += 1
+        self.tag = "group{}".format(Group._count)
+        self.members = {} # obj -> None (a dict keeps the order and finds members quickly)
+        for obj in objects:
+            self.add(obj)
+
+    def __repr__(self):
+        return "Group{}".format(tuple(self.members))
+
+    def add(self, obj):
+        """adds obj to this group (it may already be drawn)"""
+        if obj in self.members: return
+        self.members[obj] = None
+        obj._groupTags = obj._groupTags + (self.tag,)
+        if obj.canvas and not obj.canvas.isClosed():
+            obj.canvas.addtag_withtag(self.tag, obj.id)
+
+    def remove(self, obj):
+        """removes obj from this group (without undrawing it)"""
+        if self.tag not in obj._groupTags: return
+        self.members.pop(obj, None)
+        obj._groupTags = tuple(tag for tag in obj._groupTags if tag != self.tag)
+        if obj.canvas and not obj.canvas.isClosed():
+            obj.canvas.dtag(obj.id, self.tag)
+
+    def getMembers(self):
+        return list(self.members)
+
+    def _windows(self):
+        """the open windows that members of this group are drawn in"""
+        windows = []
+        for obj in self.members:
+            if obj.canvas and not obj.canvas.isClosed() and obj.canvas not in windows:
+                windows.append(obj.canvas)
+        return windows
+
+    def draw(self, graphwin):
+        """draws all the members that aren't drawn yet, with a single window update"""
+        with graphwin.batch():
+            for obj in self.members:
+                if not (obj.canvas and not obj.canvas.isClosed()):
+                    obj.draw(graphwin)
+        return self
+
+    def undraw(self):
+        """undraws all the members with one Tk call (per window)"""
+        for win in self._windows():
+            win.delete(self.tag)
+            for obj in list(self.members):
+                if obj.canvas is win:
+                    win.delItem(obj)
+                    obj._forgetCanvas()
+            win._autoflush()
+        for obj in list(self.members):
+            if obj.canvas: # its window was closed
+                obj._forgetCanvas()
+
+    def move(self, dx, dy):
+        """moves all the members dx units in x direction and dy units in y direction"""
+        for obj in self.members:
+            obj._move(dx, dy)
+        for win in self._windows():
+            if win.trans:
+                win.move(self.tag, dx / win.trans.xscale, -dy / win.trans.yscale)
+            else:
+                win.move(self.tag, dx, dy)
+            win._autoflush()
+
+    def lift(self):
+        """puts the members on top of everything else (in their layer, if they are in one)"""
+        for win in self._windows():
+            layer = self._sharedLayer()
+            if layer is not None and layer.win is win:
+                win.tag_lower(self.tag, Layer._markerTag(layer.name))
+            else:
+                win.tag_raise(self.tag)
+            win._autoflush()
+
+    def lower(self):
+        """puts the members below everything else (in their layer, if they are in one)"""
+        for win in self._windows():
+            layer = self._sharedLayer()
+            if layer is not None and layer.win is win:
+                win.tag_raise(self.tag, layer._markerBelowTag())
+            else:
+                win.tag_lower(self.tag)
+            win._autoflush()
+
+    def _sharedLayer(self):
+        layers = set(obj._layer for obj in self.members)
+        return layers.pop() if len(layers) == 1 else None
+
+    def setFill(self, color):
+        """sets the fill color of every member that has one"""
+        self._reconfigAll("fill", color)
+
+    def setOutline(self, color):
+        """sets the outline color of every member that has one"""
+        self._reconfigAll("outline", color)
+
+    def _reconfigAll(self, option, setting):
+        for obj in self.members:
+            if option in obj.config:
+                obj.config[option] = setting
+        for win in self._windows():
+            drawn = [obj for obj in self.members if obj.canvas is win]
+            if all(option in obj.config for obj in drawn):
+                win.itemconfig(self.tag, {option: setting}) # all at once
+            else:
+                for obj in drawn:
+                    if option in obj.config:
+                        win.itemconfig(obj.id, {option: setting})
+            win._autoflush()
+
+
+class Layer(Group):
+
+    """One of the fixed stacking layers of a GraphWin (see GraphWin.getLayer()).
+    Anything added to a layer is kept above everything in the layers below
+    it and below everything in the layers above it, even if it was drawn
+    later.  (Objects that aren't in any layer are drawn on top, as usual.)
+    An object stays in its layer when it is undrawn, but the layer only
+    holds on to it (in members) while it is drawn or waiting to be drawn,
+    so undrawn objects and the objects of closed windows can be freed."""
+
+    def __init__(self, win, name):
+        Group.__init__(self)
+        self.win = win
+        self.name = name
+        self.tag = "layer:" + name
+
+    def __repr__(self):
+        return "Layer({!r})".format(self.name)
+
+    @staticmethod
+    def _markerTag(name):
+        return "layertop:" + name
+
+    def _markerBelowTag(self):
+        index = self.win.layerNames.index(self.name)
+        if index == 0:
+            return "layermarker" # the first marker is the bottom of the lowest layer
+        return Layer._markerTag(self.win.layerNames[index - 1])
+
+    def add(self, obj):
+        """adds obj to this layer (taking it out of any other layer).
+        If it is already drawn in this layer's window, it is restacked right away."""
+        if obj._layer is not None and obj._layer is not self:
+            obj._layer.remove(obj)
+        obj._layer = self
+        Group.add(self, obj)
+        if obj.canvas is self.win and not self.win.isClosed():
+            self._place(obj)
+            self.win._autoflush()
+
+    def remove(self, obj):
+        if obj._layer is self:
+            obj._layer = None
+        Group.remove(self, obj)
+
+    def _place(self, obj):
+        """restacks the drawn obj on top of the rest of this layer"""
+        self.members[obj] = None # back in members if it was undrawn
+        self.win.tag_lower(obj.id, Layer._markerTag(self.name))
+
+    def draw(self, graphwin=None):
+        """draws all the members of this layer that aren't drawn yet"""
+        return Group.draw(self, graphwin or self.win)
+
+    def lift(self):
+        raise GraphicsError("layers always stay in the order of GraphWin.layerNames")
+
+    lower = lift
+
+
+class Compositor:
+
+    """Renders many sprites (e.g. the cards of a game board) into one
+    offscreen image, which is shown as a single canvas item.  When a
+    sprite changes, only its rectangle of the image is recomposited
+    from the sprites overlapping it (found with a coarse grid), so
+    updates cost the same no matter how many sprites there are.
+
+        board = Compositor(win, layer="board")
+        board.place(card, cardImage, x, y)
+        board.setSprite(card, otherImage)   # e.g. flip the card"""
+
+    cellSize = 64 # pixels per side of the grid cells used to find the sprites in a rectangle
+
+    def __init__(self, win, x=0, y=0, width=None, height=None, layer=None):
+        # x, y, width, height give the area covered, in raw (window) pixels
+        if width is None: width = win.getWidth() - x
+        if height is None: height = win.getHeight() - y
+        self.win = win
+        self.x, self.y = int(x), int(y)
+        self.width, self.height = int(width), int(height)
+        self.sprites = {} # key -> [tk photoimage, left, top] (bottom to top)
+        self._cells = {} # (column, row) -> set of keys of the sprites overlapping the cell
+        self._drawOrder = {} # key -> position in self.sprites, to overlay the sprites of a cell in order
+        self._placed = 0
+        self._blank = win._addResource(_backend.newImage(self.width, self.height, master=win))
+        self._stats = _Counters("composites", "copies", "pixels", "spritesVisited")
+        # (Tk centers images on their anchor, so this puts the left/top edges at x, y)
+        center = Point(*win.toWorld(self.x + self.width // 2, self.y + self.height // 2))
+        self.image = Image(center, self.width, self.height)
+        if layer is not None:
+            win.getLayer(layer).add(self.image)
+        self.image.draw(win)
+
+    @staticmethod
+    def _photoImageOf(sprite):
+        return sprite.img if isinstance(sprite, Image) else sprite
+
+    def place(self, key, sprite, x, y):
+        """shows sprite (an Image or tk PhotoImage) centered at (x,y) in window
+        coordinates, replacing whatever was shown for key before"""
+        photo = Compositor._photoImageOf(sprite)
+        xs, ys = self.win.toScreen(x, y)
+        left = xs - self.x - photo.width() // 2
+        top = ys - self.y - photo.height() // 2
+        old = self.sprites.get(key)
+        self.sprites[key] = [photo, left, top]
+        dirty = self._spriteRect(photo, left, top)
+        if old is not None:
+            self._unindex(key, self._spriteRect(*old))
+            dirty = _unionRect(dirty, self._spriteRect(*old))
+        else:
+            self._drawOrder[key] = self._placed
+            self._placed += 1
+        self._index(key, self._spriteRect(photo, left, top))
+        self._recomposite(*dirty)
+
+    def setSprite(self, key, sprite):
+        """shows a different sprite for key, at the same center location"""
+        photo = Compositor._photoImageOf(sprite)
+        oldPhoto, left, top = self.sprites[key]
+        centerX = left + oldPhoto.width() // 2
+        centerY = top + oldPhoto.height() // 2
+        newLeft, newTop = centerX - photo.width() // 2, centerY - photo.height() // 2
+        self.sprites[key] = [photo, newLeft, newTop]
+        self._unindex(key, self._spriteRect(oldPhoto, left, top))
+        self._index(key, self._spriteRect(photo, newLeft, newTop))
+        self._recomposite(*_unionRect(self._spriteRect(oldPhoto, left, top),
+                                      self._spriteRect(photo, newLeft, newTop)))
+
+    def remove(self, key):
+        """stops showing the sprite for key"""
+        old = self.sprites.pop(key, None)
+        if old is not None:
+            del self._drawOrder[key]
+            self._unindex(key, self._spriteRect(*old))
+            self._recomposite(*self._spriteRect(*old))
+
+    @staticmethod
+    def _spriteRect(photo, left, top):
+        return (left, top, left + photo.width(), top + photo.height())
+
+    def _cellsIn(self, x1, y1, x2, y2):
+        """returns the grid cells overlapping the rectangle (within the image)"""
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return []
+        size = self.cellSize
+        return [(column, row) for row in range(y1 // size, (y2 - 1) // size + 1)
+                              for column in range(x1 // size, (x2 - 1) // size + 1)]
+
+    def _index(self, key, rect):
+        for cell in self._cellsIn(*rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def _unindex(self, key, rect):
+        for cell in self._cellsIn(*rect):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def _spritesIn(self, x1, y1, x2, y2):
+        """returns the keys of the sprites that may overlap the rectangle, bottom to top"""
+        keys = set()
+        for cell in self._cellsIn(x1, y1, x2, y2):
+            keys.update(self._cells.get(cell, ()))
+        return sorted(keys, key=self._drawOrder.__getitem__)
+
+    def _recomposite(self, x1, y1, x2, y2):
+        """redraws the rectangle (x1,y1)-(x2,y2) of the image from the sprites in it"""
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if x1 >= x2 or y1 >= y2 or self.win.isClosed():
+            return
+        img = self.image.img
+        # clear the rectangle (back to transparent) then overlay the sprites, bottom to top
+        _backend.copyImage(img, self._blank, (x1, y1, x2, y2), to=(x1, y1), overlay=False)
+        copies = 1
+        keys = self._spritesIn(x1, y1, x2, y2)
+        for key in keys:
+            photo, left, top = self.sprites[key]
+            fromX1, fromY1 = max(x1, left), max(y1, top)
+            fromX2, fromY2 = min(x2, left + photo.width()), min(y2, top + photo.height())
+            if fromX1 < fromX2 and fromY1 < fromY2:
+                _backend.copyImage(img, photo, (fromX1 - left, fromY1 - top, fromX2 - left, fromY2 - top),
+                                   to=(fromX1, fromY1))
+                copies += 1
+        self._stats.add("composites")
+        self._stats.add("copies", copies)
+        self._stats.add("pixels", (x2 - x1) * (y2 - y1))
+        self._stats.add("spritesVisited", len(keys))
+        self.win._autoflush()
+
+    def undraw(self):
+        self.image.undraw()
+
+    def getStats(self):
+        """Returns a dictionary counting recomposited rectangles, the Tk copies
+        they needed, the pixels they covered and the sprites looked at"""
+        return self._stats.snapshot()
+
+def _unionRect(rect1, rect2):
+    return (min(rect1[0], rect2[0]), min(rect1[1], rect2[1]),
+            max(rect1[2], rect2[2]), max(rect1[3], rect2[3]))
+
+
+class ImageCache:
+
+    """Cache of tk PhotoImages decoded from image files.  The cache is bounded by
+    the decoded size of the images (4 bytes per pixel) rather than by how many
+    images it holds.  When it gets too big, the least recently used images
+    are evicted, except for pinned ones."""
+
+    def __init__(self, maxBytes=128 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.totalBytes = 0
+        self._stats = _Counters("hits", "misses", "evictions")
+        self._images = _collections.OrderedDict() # filename -> tk PhotoImage, least recently used first
+        self._sizes = {}
+        self._pinned = set()
+
+    def __contains__(self, filename):
+        return filename in self._images
+
+    def get(self, filename):
+        """returns the tk PhotoImage for the file, decoding it if it isn't cached"""
+        img = self._images.get(filename)
+        if img is not None:
+            self._stats.add("hits")
+            self._images.move_to_end(filename)
+            return img
+        self._stats.add("misses")
+        return self._add(filename, _backend.loadImage(filename))
+
+    def preload(self, filenames):
+        """decodes all the given image files now, so later uses don't have to wait"""
+        for filename in filenames:
+            if filename not in self._images:
+                self._add(filename, _backend.loadImage(filename))
+
+    def pin(self, filename):
+        """loads the image file (if needed) and keeps it from ever being evicted"""
+        self._pinned.add(filename)
+        if filename not in self._images:
+            self._add(filename, _backend.loadImage(filename))
+
+    def unpin(self, filename):
+        """allows the image file to be evicted again"""
+        self._pinned.discard(filename)
+        self._evict()
+
+    def setMaxBytes(self, maxBytes):
+        """changes the size limit of the cache (in bytes of decoded image data)"""
+        self.maxBytes = maxBytes
+        self._evict()
+
+    def getStats(self):
+        """returns a dictionary with hit/miss/eviction counts and the current size"""
+        return self._stats.snapshot(images=len(self._images), pinned=len(self._pinned),
+                                    bytes=self.totalBytes, maxBytes=self.maxBytes)
+
+    def clear(self):
+        """removes all images that aren't pinned"""
+        for filename in list(self._images):
+            if filename not in self._pinned:
+                self._remove(filename)
+
+    def _add(self, filename, img):
+        self._images[filename] = img
+        self._sizes[filename] = img.width() * img.height() * 4
+        self.totalBytes += self._sizes[filename]
+        self._evict()
+        return img
+
+    def _remove(self, filename):
+        del self._images[filename]
+        self.totalBytes -= self._sizes.pop(filename)
+
+    def _evict(self):
+        for filename in list(self._images):
+            if self.totalBytes <= self.maxBytes:
+                break
+            if filename not in self._pinned:
+                self._remove(filename)
+                self._stats.add("evictions")
+
+
+class ImagePreloader:
+
+    """Loads image files into an ImageCache in the background, e.g. while a
+    menu screen is waiting for the user.  Worker threads read the files from
+    disk, and the images are then decoded on the Tk thread a few at a time,
+    whenever Tk is idle (Tk objects can only be used from that thread).
+    If scaleFactors are given, the scaled sprites are prepared as well.
+
+        preloader = ImagePreloader(filenames, scaleFactors=[0.5])
+        preloader.start()"""
+
+    def __init__(self, filenames, cache=None, scaleFactors=(), workers=4, imagesPerSlice=1):
+        self.filenames = list(filenames)
+        self.cache = cache
+        self.scaleFactors = list(scaleFactors)
+        self.workers = workers
+        self.imagesPerSlice = imagesPerSlice
+        self.loaded = []
+        self.failed = []
+        self._fileData = _queue.Queue() # (filename, bytes or None) from the worker threads
+        self._pending = 0
+        self._started = False
+
+    def start(self):
+        """starts reading the files in the background; returns self"""
+        if self._started: return self
+        self._started = True
+        cache = self._getCache()
+        toRead = [filename for filename in self.filenames if filename not in cache]
+        for filename in self.filenames:
+            if filename in cache: # already decoded, but the sprites may still be needed
+                self._fileData.put((filename, None))
+        self._pending = len(self.filenames)
+        if toRead:
+            executor = _futures.ThreadPoolExecutor(max_workers=self.workers)
+            for filename in toRead:
+                executor.submit(self._readFile, filename)
+            executor.shutdown(wait=False)
+        if self._pending > 0:
+            _root.after_idle(self._decodeSlice)
+        return self
+
+    def isDone(self):
+        return self._started and self._pending == 0
+
+    def getProgress(self):
+        """returns (number of files finished, total number of files)"""
+        return len(self.loaded) + len(self.failed), len(self.filenames)
+
+    def wait(self):
+        """keeps processing Tk events until all the files have been loaded"""
+        self.start()
+        while not self.isDone():
+            _root.update()
+            _time.sleep(0.01)
+
+    def _getCache(self):
+        return self.cache if self.cache is not None else Image.fileCache
+
+    def _readFile(self, filename):
+        # runs on a worker thread, so it must not touch Tk
+        try:
+            with open(filename, "rb") as imageFile:
+                self._fileData.put((filename, imageFile.read()))
+        except OSError:
+            self._fileData.put((filename, None))
+
+    def _decodeSlice(self):
+        cache = self._getCache()
+        for _ in range(self.imagesPerSlice):
+            try:
+                filename, data = self._fileData.get_nowait()
+            except _queue.Empty:
+                break
+            self._pending -= 1
+            try:
+                if filename not in cache:
+                    if data is None:
+                        raise GraphicsError("could not read " + filename)
+                    cache._add(filename, _backend.loadImage(data=data))
+                for scaleFactor in self.scaleFactors:
+                    Image.spriteCache.getSprite(filename, scaleFactor, scaleFactor, cache)
+                self.loaded.append(filename)
+            except (GraphicsError, _backend.Error):
+                self.failed.append(filename)
+        if self._pending > 0:
+            if self._fileData.empty():
+                _root.after(10, self._decodeSlice) # wait for the worker threads
+            else:
+                _root.after_idle(self._decodeSlice)
+
+
+class SpriteCache:
+
+    """Process-wide cache of scaled (and possibly flipped) tk PhotoImages for
+    images loaded from files.  Sprites are keyed by (filename, scaling factors,
+    flip flags), so each combination is only built once and then shared by
+    every Image that asks for it.  Like ImageCache, it is bounded by the
+    decoded size of the sprites: when it gets too big, the least recently
+    used ones are evicted (Images still showing them keep them alive)."""
+
+    def __init__(self, maxBytes=64 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.totalBytes = 0
+        self._stats = _Counters("hits", "misses", "evictions")
+        self._sprites = _collections.OrderedDict() # key -> tk PhotoImage, least recently used first
+        self._sizes = {}
+
+    def getSprite(self, filename, scaleFactorX, scaleFactorY, fileCache=None):
+        """returns the tk PhotoImage for the image file scaled by the given
+        factors (negative factors flip the image), building it on first use
+        from the decoded file in fileCache (default: Image.fileCache)"""
+        # rounded, so factors that only differ by floating point noise share a sprite
+        key = (filename, round(abs(scaleFactorX), 6), round(abs(scaleFactorY), 6),
+               scaleFactorX < 0, scaleFactorY < 0, Image.scalingMode, Image.accurateScaling)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._stats.add("hits")
+            self._sprites.move_to_end(key)
+            return sprite
+        self._stats.add("misses")
+        if fileCache is None:
+            fileCache = Image.fileCache
+        sprite = Image._scalePhotoImage(fileCache.get(filename), scaleFactorX, scaleFactorY)
+        self._sprites[key] = sprite
+        self._sizes[key] = sprite.width() * sprite.height() * 4
+        self.totalBytes += self._sizes[key]
+        self._evict()
+        return sprite
+
+    def setMaxBytes(self, maxBytes):
+        """changes the size limit of the cache (in bytes of decoded image data)"""
+        self.maxBytes = maxBytes
+        self._evict()
+
+    def getStats(self):
+        """returns a dictionary with hit/miss/eviction counts and the current size"""
+        return self._stats.snapshot(sprites=len(self._sprites), bytes=self.totalBytes, maxBytes=self.maxBytes)
+
+    def clear(self):
+        """forgets all cached sprites and resets the statistics"""
+        self._sprites.clear()
+        self._sizes.clear()
+        self.totalBytes = 0
+        self._stats.reset()
+
+    def _evict(self):
+        while self.totalBytes > self.maxBytes and len(self._sprites) > 1:
+            key, _ = self._sprites.popitem(last=False)
+            self.totalBytes -= self._sizes.pop(key)
+            self._stats.add("evictions")
+
+
+class SharedPixelStore:
+
+    """Reference counts for tk PhotoImages shared by Image clones.  A clone
+    shares its original's pixels until one of them is modified (with
+    setPixel/putPixels), which then gets its own copy first.  After
+    trackImages(), also keeps track of all the live Images for the
+    statistics."""
+
+    def __init__(self):
+        self._shares = {} # id(tk photoimage) -> [tk photoimage, number of Images using it]
+        self._images = None # the live Images (a WeakSet), once trackImages() is called
+        self._stats = _Counters("clones", "copiesOnWrite")
+
+    def trackImages(self, enabled=True):
+        """starts (or stops) keeping track of the Images created from now on,
+        so getStats() can count them and memory_report() can list them"""
+        self._images = _weakref.WeakSet() if enabled else None
+
+    def track(self, image):
+        if self._images is not None:
+            self._images.add(image)
+
+    def share(self, image):
+        """counts image as one more user of its current tk photoimage (an
+        image can share several: its scaled image and its original size one)"""
+        photo = image._img
+        if id(photo) in image._sharedPhotos:
+            return
+        entry = self._shares.setdefault(id(photo), [photo, 0])
+        entry[1] += 1
+        # (stop counting the image when it's garbage collected)
+        image._sharedPhotos[id(photo)] = (photo, _weakref.finalize(image, self._unshare, id(photo)))
+
+    def release(self, image, photo):
+        """stops counting image as a user of the tk photoimage"""
+        photo, finalizer = image._sharedPhotos.pop(id(photo))
+        finalizer()
+
+    def _unshare(self, key):
+        entry = self._shares[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._shares[key]
+
+    def isShared(self, photo):
+        """returns True if more than one Image is using the tk photoimage"""
+        entry = self._shares.get(id(photo))
+        return entry is not None and entry[1] > 1
+
+    def getStats(self):
+        """returns a dictionary with the clones made, the copies made when shared
+        pixels were modified, and the bytes saved by sharing.  After trackImages(),
+        it also counts the live Images that share their pixels (with clones or
+        through the image caches), have their own private pixels, or haven't been
+        decoded yet."""
+        stats = self._stats.snapshot(bytesSaved=0)
+        if self._images is not None:
+            stats.update(shared=0, private=0, undecoded=0)
+            for image in list(self._images):
+                if image._img is None:
+                    stats["undecoded"] += 1
+                elif image.possiblyUsingSharedCacheImage or self.isShared(image._img):
+                    stats["shared"] += 1
+                else:
+                    stats["private"] += 1
+        for photo, count in self._shares.values():
+            stats["bytesSaved"] += (count - 1) * photo.width() * photo.height() * 4
+        return stats
+
+
 class Image(GraphicsObject):
 
     idCount = 0
     imageCache = {} # tk photoimages go here to avoid GC while drawn 
+    fileCache = ImageCache() # decoded image files, shared by all Images
+    spriteCache = SpriteCache() # scaled images loaded from files, shared by all Images
+    pixelStore = SharedPixelStore() # pixels shared by clones (copied when one gets modified)
+    accurateScaling = False # if True, resizing may use two zoom/subsample stages to get closer to the requested size
+    scalingMode = "sample" # "sample" (Tk's zoom/subsample) or "area" (shrink by averaging pixels: smoother)
+    maxIntermediatePixels = 4000000 # bigger resizes are done a row/column at a time instead of with zoom/subsample
+    _flipCache = _weakref.WeakKeyDictionary() # source tk photoimage -> {(flipX,flipY): flipped photoimage}
+    _img = None
     
     def __init__(self, p, *pixmap):
         GraphicsObject.__init__(self, [])
         self.anchor = p.clone()
         self.imageId = Image.idCount
         Image.idCount = Image.idCount + 1
+        self._sharedPhotos = {} # id -> (tk photoimage shared with clones, finalizer), counted in pixelStore
+        Image.pixelStore.track(self)
         if len(pixmap) == 1: # file name provided
-            self._setPhotoImage(Image._loadPhotoImageFromFile(pixmap[0]))
+            # the file isn't decoded until the pixels are needed (see _decode())
+            self._img = None
+            self.originalSizeImage = None
+            self.scaleFactorX = 1.0
+            self.scaleFactorY = 1.0
             self.possiblyUsingSharedCacheImage = True
+            self.sourceFile = pixmap[0]
         else: # width and height provided
             width, height = pixmap
-            self._setPhotoImage(_tk.PhotoImage(master=_root, width=width, height=height))
+            self._setPhotoImage(_backend.newImage(width, height))
             self.possiblyUsingSharedCacheImage = False
+            self.sourceFile = None
 
     def _setPhotoImage(self, photoImg):
-        self.img = photoImg
         self.scaleFactorX = 1.0
         self.scaleFactorY = 1.0
-        self.originalSizeImage = self.img
+        self.originalSizeImage = photoImg
+        self._showPhotoImage(photoImg)
+
+    @property
+    def img(self):
+        """the tk PhotoImage shown by this Image (decoded/scaled when first needed)"""
+        if self._img is None:
+            self._decode()
+        return self._img
+
+    @img.setter
+    def img(self, photoImg):
+        self._img = photoImg
+        self._checkSharing()
+
+    def _checkSharing(self):
+        """stops counting this Image as a user of the pixels it shared with
+        clones once neither its image nor its original size image uses them"""
+        for photo, finalizer in list(self._sharedPhotos.values()):
+            if self._img is not photo and self.originalSizeImage is not photo:
+                Image.pixelStore.release(self, photo)
+
+    def isDecoded(self):
+        """Returns False if this Image's file hasn't been decoded (or scaled) yet"""
+        return self._img is not None
+
+    def _decode(self):
+        """decodes the image file, applying all the scaling/flipping done so
+        far in one step (scaled images come from Image.spriteCache)"""
+        self.originalSizeImage = Image._loadPhotoImageFromFile(self.sourceFile)
+        if self.scaleFactorX == 1 and self.scaleFactorY == 1:
+            self._img = self.originalSizeImage
+        else:
+            self._img = Image.spriteCache.getSprite(self.sourceFile, self.scaleFactorX, self.scaleFactorY)
+
+    def _showPhotoImage(self, photoImg):
+        """makes this Image display photoImg (reusing its canvas item, if it is drawn)"""
+        self.img = photoImg
         if self.canvas and not self.canvas.isClosed():
             # update img reference, so even if this object gets GC'd, canvas can still draw it
             self.imageCache[self.imageId] = self.img 
             self.canvas.itemconfig(self.id, image=self.img)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
 
     def __repr__(self):
         try:
@@ -1352,10 +3168,13 @@ class Image(GraphicsObject):
         p = self.anchor
         x,y = canvas.toScreen(p.x,p.y)
         self.imageCache[self.imageId] = self.img # save a reference  
-        return canvas.create_image(x,y,image=self.img)
+        return canvas.create_image(x,y,options,image=self.img)
     
     def _move(self, dx, dy):
         self.anchor.move(dx,dy)
+
+    def _screenCoords(self, canvas):
+        return list(canvas.toScreen(self.anchor.x,self.anchor.y))
         
     def undraw(self):
         try:
@@ -1364,17 +3183,37 @@ class Image(GraphicsObject):
             pass
         GraphicsObject.undraw(self)
 
+    def _forgetCanvas(self):
+        self.imageCache.pop(self.imageId, None)  # allow gc of tk photoimage
+        GraphicsObject._forgetCanvas(self)
+
     def getAnchor(self):
         return self.anchor.clone()
     
     def getCenter(self):
         return self.getAnchor()
+
+    def getCenterVec(self):
+        return self.anchor.toVec()
         
     def clone(self):
-        other = Image(Point(0,0), 0, 0)
-        other.img = self.img.copy()
-        other.anchor = self.anchor.clone()
+        """Returns a copy of this Image.  The copy shares the same pixels
+        until one of them gets modified (so cloning is cheap)."""
+        if self.sourceFile is not None:
+            other = Image(self.anchor, self.sourceFile) # shares the cached images for the file
+            other._img = self._img
+            other.originalSizeImage = self.originalSizeImage
+        else:
+            other = Image(self.anchor, 0, 0)
+            Image.pixelStore.share(self)
+            other.img = self._img
+            other.originalSizeImage = self.originalSizeImage
+            other.possiblyUsingSharedCacheImage = self.possiblyUsingSharedCacheImage
+            Image.pixelStore.share(other)
+        other.scaleFactorX = self.scaleFactorX
+        other.scaleFactorY = self.scaleFactorY
         other.config = self.config.copy()
+        Image.pixelStore._stats.add("clones")
         return other
 
     def getWidth(self):
@@ -1425,13 +3264,60 @@ class Image(GraphicsObject):
         """Sets pixel (x,y) to the given color
         
         """
-        if self.possiblyUsingSharedCacheImage and (self.img is self.originalSizeImage):
-            self._setPhotoImage(self.img.copy())
+        self._prepareForChanges()
+        _backend.putColors(self.img, x, y, [[color]])
+
+    def getPixels(self, region=None, asArray=False):
+        """Returns the RGB color values of all the pixels in region, which is a
+        tuple (x, y, width, height) and defaults to the whole image.  The result
+        is a bytearray with 3 bytes (r,g,b) per pixel, row by row, or a NumPy
+        array with shape (height, width, 3) if asArray is True.
+        (Much faster than calling getPixel(x,y) for each pixel.)"""
+        x, y, width, height = self._checkRegion(region)
+        rgb = _backend.getRGB(self.img, (x, y, x + width, y + height))
+        if asArray:
+            if _numpy is None:
+                raise GraphicsError("asArray=True requires the numpy package")
+            return _numpy.frombuffer(bytes(rgb), dtype=_numpy.uint8).reshape(height, width, 3).copy()
+        return rgb
+
+    def putPixels(self, region, pixels):
+        """Sets all the pixels in region, which is a tuple (x, y, width, height)
+        (or None for the whole image), from pixels: a bytes, bytearray or
+        memoryview with 3 bytes (r,g,b) per pixel, row by row, or a NumPy array
+        of shape (height, width, 3).  (Much faster than calling setPixel(x,y,color)
+        for each pixel.)"""
+        x, y, width, height = self._checkRegion(region)
+        if _numpy is not None and isinstance(pixels, _numpy.ndarray):
+            pixels = _numpy.ascontiguousarray(pixels, dtype=_numpy.uint8).tobytes()
+        rgb = bytes(pixels)
+        if len(rgb) != width * height * 3:
+            raise GraphicsError("putPixels needs exactly 3 bytes for each pixel in the region")
+        self._prepareForChanges()
+        _backend.putRGB(self.img, x, y, width, height, rgb)
+
+    def _checkRegion(self, region):
+        """returns region as (x, y, width, height), after checking it fits in the image"""
+        if region is None:
+            return 0, 0, self.getWidth(), self.getHeight()
+        x, y, width, height = map(int, region)
+        if x < 0 or y < 0 or width < 0 or height < 0 or x + width > self.getWidth() or y + height > self.getHeight():
+            raise GraphicsError("region {} doesn't fit in the image".format(region))
+        return x, y, width, height
+
+    def _prepareForChanges(self):
+        """Makes sure this Image has its own copy of the pixels before they get
+        modified (copying at most once), since images loaded from files, their
+        scaled sprites and flipped versions are shared, and so are clones' pixels."""
+        if self.possiblyUsingSharedCacheImage or Image.pixelStore.isShared(self.img):
+            self._setPhotoImage(_copyPhotoImage(self.img))
             self.possiblyUsingSharedCacheImage = False
-            
-        self.img.put("{" + color +"}", (x, y))
+            Image.pixelStore._stats.add("copiesOnWrite")
+        Image._flipCache.pop(self.img, None) # any flipped versions we made are out of date now
          # if the image gets modified, we'll have to rescale the image from the current image, instead of the original loaded image.
         self.originalSizeImage = self.img
+        self._checkSharing()
+        self.sourceFile = None
         self.scaleFactorX = 1.0
         self.scaleFactorY = 1.0
 
@@ -1445,17 +3331,28 @@ class Image(GraphicsObject):
         ext = name.split(".")[-1]
         self.img.write( filename, format=ext)
 
-    def load(self, imageFileName):
-        """loads file imageFileName to be displayed by this Image object."""
-        
-        self._setPhotoImage(Image._loadPhotoImageFromFile(imageFileName))
+    def load(self, imageFileName, scalingFactorX=1.0, scalingFactorY=None):
+        """loads file imageFileName to be displayed by this Image object,
+        scaled by the given factor(s) (the same way as scale()).
+        If this Image is drawn, it keeps its place on the canvas and
+        just switches pictures, which is much faster than undrawing it
+        and drawing a new Image."""
+        if scalingFactorY == None:
+            scalingFactorY = scalingFactorX
         self.possiblyUsingSharedCacheImage = True
+        self.sourceFile = imageFileName
+        self.scaleFactorX = scalingFactorX
+        self.scaleFactorY = scalingFactorY
+        self.originalSizeImage = None
+        self.img = None
+        if self.canvas and not self.canvas.isClosed():
+            self._decode()
+            self._showPhotoImage(self._img)
 
     ## Helper function for loading & caching images from files
     @staticmethod
-    @_functools.lru_cache(40)
     def _loadPhotoImageFromFile(filename):
-        return _tk.PhotoImage(file=filename, master=_root)
+        return Image.fileCache.get(filename)
 
     ## Helper function for resizing images (approximately)
     # since TK only allows integer zooming & integer subsampling (*sigh*)
@@ -1477,9 +3374,19 @@ class Image(GraphicsObject):
         floats,fractions = zip(*sorted(lookup))
         return floats,fractions
         
+    @staticmethod
+    def _closestTableIndex(floats, value):
+        """returns the index of the closest value in the sorted list floats
+           (the lower one, if there is a tie)"""
+        i = _bisect.bisect_left(floats, value)
+        if i == len(floats) or (i > 0 and value - floats[i-1] <= floats[i] - value):
+            i -= 1
+        return i
+
     ## Helper function for resizing images (approximately)
     # since TK only allows integer zooming & integer subsampling (*sigh*)
     @staticmethod
+    @_functools.lru_cache(256)
     def _chooseClosestUsableFraction(scaleFactor):
         if scaleFactor == 0:
             return (0,1)
@@ -1493,39 +3400,137 @@ class Image(GraphicsObject):
             return (int(scaleFactor),1)
         else:
             floats,fractions = Image._generateFractionLookupTable(20,40)
-            minIndex = min(range(len(floats)), key = lambda i: abs(floats[i]-scaleFactor))
-            return fractions[minIndex]        
+            return fractions[Image._closestTableIndex(floats, scaleFactor)]
+
+    ## Helper functions for planning the zoom & subsample steps of a resize
+    @staticmethod
+    @_functools.lru_cache(256)
+    def _chooseScalePlan(scaleFactor, accurate=False):
+        """returns a tuple of (zoom, subsample) stages that together resize by
+           (approximately) scaleFactor, picking the order of stages that creates
+           the fewest intermediate pixels.  If accurate is True, pairs of usable
+           fractions that get closer to scaleFactor (without costing more) are
+           considered too."""
+        num,den = Image._chooseClosestUsableFraction(scaleFactor)
+        bestPlan = Image._cheapestPlan(((num,den),), scaleFactor)
+        if accurate and num != 0:
+            bestCost = Image._planCost(bestPlan)
+            bestError = abs(num/den - scaleFactor)
+            floats,fractions = Image._generateFractionLookupTable(20,40)
+            for first,firstFraction in zip(floats,fractions):
+                remainder = scaleFactor / first
+                if remainder < floats[0] or remainder > floats[-1]:
+                    continue
+                i = Image._closestTableIndex(floats, remainder)
+                error = abs(first * floats[i] - scaleFactor)
+                if error < bestError:
+                    plan = Image._cheapestPlan((firstFraction, fractions[i]), scaleFactor)
+                    if plan is not None and Image._planCost(plan) <= bestCost:
+                        bestPlan, bestCost, bestError = plan, Image._planCost(plan), error
+        return bestPlan
+
+    @staticmethod
+    def _cheapestPlan(stages, scaleFactor):
+        """returns the cheapest ordering of the stages (possibly subsampling part of
+           the way up front) that never shrinks the image below its final size
+           along the way, since that would throw away detail.  None if there is none."""
+        candidates = [tuple(stages), tuple(stages[::-1])]
+        candidates += [Image._presubsample(plan) for plan in candidates]
+        candidates = [plan for plan in candidates if Image._keepsDetail(plan, scaleFactor)]
+        if not candidates:
+            return None
+        return min(candidates, key=Image._planCost)
+
+    @staticmethod
+    def _keepsDetail(stages, scaleFactor):
+        ratio = 1.0
+        for num,den in stages[:-1]:
+            ratio = ratio * num / den
+            if ratio < scaleFactor * 0.999:
+                return False
+        return True
+
+    @staticmethod
+    def _presubsample(stages):
+        """moves part of the first stage's subsampling in front of its zooming"""
+        num,den = stages[0]
+        for k in range(den // max(num,1), 1, -1):
+            if den % k == 0:
+                return ((1,k),(num,den//k)) + tuple(stages[1:])
+        return tuple(stages)
+
+    @staticmethod
+    def _alignPlans(planX, planY):
+        """pads the x & y plans with (1,1) stages, so they have the same number of stages"""
+        stageCount = max(len(planX), len(planY))
+        return (planX + ((1,1),) * (stageCount - len(planX)),
+                planY + ((1,1),) * (stageCount - len(planY)))
+
+    @staticmethod
+    def _peakPixels(width, height, planX, planY):
+        """returns the size (in pixels) of the largest image created while running the plans"""
+        peak = width * height
+        for (numX,denX),(numY,denY) in zip(planX, planY):
+            width *= numX
+            height *= numY
+            peak = max(peak, width * height)
+            width = -(-width // denX)
+            height = -(-height // denY)
+        return peak
+
+    @staticmethod
+    def _planCost(stages):
+        """relative number of pixels created while running the (zoom, subsample) stages"""
+        area = 1.0
+        cost = 0.0
+        for num,den in stages:
+            if num != 1:
+                area *= num*num
+                cost += area
+            if den != 1:
+                area /= den*den
+                cost += area
+        return cost
 
     @staticmethod
     def _tkFlip(img, flipX, flipY):
         """returns a potentially flipped version of the tk PhotoImage, depending
-           on whether flipX and flipY are True/False"""
+           on whether flipX and flipY are True/False.  Flipped versions are
+           remembered for each source image, so flipping back and forth is cheap."""
         if not flipX and not flipY:
             return img
 
-        width,height = img.width(),img.height()
+        flippedVersions = Image._flipCache.get(img)
+        if flippedVersions is None:
+            flippedVersions = Image._flipCache[img] = {}
+        flippedImg = flippedVersions.get((flipX, flipY))
+        if flippedImg is None:
+            flippedImg = Image._tkFlipCopy(img, flipX, flipY)
+            flippedVersions[(flipX, flipY)] = flippedImg
+        return flippedImg
 
-        startX, endX, incrementX = (width - 1, -1, -1) if flipX else (0, width, 1)
-        startY, endY, incrementY = (height - 1, -1, -1) if flipY else (0, height, 1)
-
-        dataList = []
-        transpList = [] #record (x,y) of any transparent pixel
-        for y in range(startY, endY, incrementY):
-            dataList.append("{")
-            for x in range(startX, endX, incrementX):
-                dataList.append("#%02x%02x%02x " % img.get(x, y))
-                if img.tk.call(img.name, "transparency", "get",x, y):
-                    newX = width - 1 - x if flipX else x
-                    newY = height - 1 - y if flipY else y
-                    transpList.append((newX,newY))
-
-            dataList.append("} ")
-        flippedImg = _tk.PhotoImage(width=width,height=height)
-        flippedImg.put(''.join(dataList), to=(0,0,width,height))
-        #set transparency on all the pixels
-        for x,y in transpList:
-            flippedImg.tk.call(flippedImg.name, "transparency", "set", x, y,True)
-                
+    @staticmethod
+    def _tkFlipCopy(img, flipX, flipY):
+        """returns a new flipped copy of the tk PhotoImage (including transparency)"""
+        try:
+            # Tk mirrors the image when copying with a negative subsample, all in one call
+            return _copyPhotoImage(img, subsample=(-1 if flipX else 1, -1 if flipY else 1))
+        except _backend.Error:
+            pass
+
+        # fallback: copy whole columns and rows at a time into their mirrored positions
+        width,height = img.width(),img.height()
+        flippedImg = _backend.newImage(width, height)
+        source = img
+        if flipX:
+            for x in range(width):
+                _backend.copyImage(flippedImg, source, (x, 0, x + 1, height), to=(width - 1 - x, 0))
+            if flipY:
+                source = flippedImg
+                flippedImg = _backend.newImage(width, height)
+        if flipY:
+            for y in range(height):
+                _backend.copyImage(flippedImg, source, (0, y, width, y + 1), to=(0, height - 1 - y))
         return flippedImg
 
     #@staticmethod
@@ -1537,6 +3542,70 @@ class Image(GraphicsObject):
         # TODO: modify the _tkFlip approach above, or see answers at:
         #  https://stackoverflow.com/questions/41248426/how-to-rotate-an-image-on-a-canvas-without-using-pil
 
+    @staticmethod
+    def _scalePhotoImage(img, scaleFactorX, scaleFactorY):
+        """returns a resized (and potentially flipped) version of the tk PhotoImage
+           (negative scaling factors flip the image)"""
+        flipX = (scaleFactorX < 0)
+        flipY = (scaleFactorY < 0)
+        scaleFactorX, scaleFactorY = abs(scaleFactorX), abs(scaleFactorY)
+        if (Image.scalingMode == "area" and scaleFactorX <= 1 and scaleFactorY <= 1
+                and (scaleFactorX, scaleFactorY) != (1, 1) and min(scaleFactorX, scaleFactorY) > 0):
+            scaledImg = Image._areaScalePhotoImage(img, scaleFactorX, scaleFactorY)
+            return Image._tkFlip(scaledImg,flipX,flipY)
+
+        planX,planY = Image._alignPlans(Image._chooseScalePlan(scaleFactorX, Image.accurateScaling),
+                                        Image._chooseScalePlan(scaleFactorY, Image.accurateScaling))
+        if Image._peakPixels(img.width(), img.height(), planX, planY) > Image.maxIntermediatePixels:
+            scaledImg = Image._stripScalePhotoImage(img, scaleFactorX, scaleFactorY)
+            return Image._tkFlip(scaledImg,flipX,flipY)
+
+        scaledImg = img
+        for (numX,denX),(numY,denY) in zip(planX, planY):
+            if numX != 1 or numY != 1:
+                scaledImg = _copyPhotoImage(scaledImg, zoom=(numX,numY))
+            if denX != 1 or denY != 1:
+                scaledImg = _copyPhotoImage(scaledImg, subsample=(denX,denY))
+        
+        return Image._tkFlip(scaledImg,flipX,flipY)
+
+    @staticmethod
+    def _stripScalePhotoImage(img, scaleFactorX, scaleFactorY):
+        """returns a resized copy of the tk PhotoImage, made by copying (and
+           zooming) one column and then one row at a time into place.  This takes
+           more Tk calls than zoom/subsample, but hits the size exactly and never
+           needs images bigger than the result."""
+        width,height = img.width(),img.height()
+        newWidth = max(1, round(width * scaleFactorX))
+        newHeight = max(1, round(height * scaleFactorY))
+        if newWidth != width:
+            stretched = _backend.newImage(newWidth, height)
+            for x in range(width):
+                start, end = x * newWidth // width, (x + 1) * newWidth // width
+                if end > start:
+                    _backend.copyImage(stretched, img, (x, 0, x + 1, height), to=(start, 0), zoom=(end - start, 1))
+            img = stretched
+        if newHeight != height:
+            stretched = _backend.newImage(newWidth, newHeight)
+            for y in range(height):
+                start, end = y * newHeight // height, (y + 1) * newHeight // height
+                if end > start:
+                    _backend.copyImage(stretched, img, (0, y, newWidth, y + 1), to=(0, start), zoom=(1, end - start))
+            img = stretched
+        return img
+
+    @staticmethod
+    def _areaScalePhotoImage(img, scaleFactorX, scaleFactorY):
+        """returns a shrunk copy of the tk PhotoImage, where each new pixel is the
+           average of the block of pixels it replaces (smoother than subsampling)"""
+        width,height = img.width(),img.height()
+        newWidth = max(1, round(width * scaleFactorX))
+        newHeight = max(1, round(height * scaleFactorY))
+        rgba = _areaResize(width, height, _photoImageToRGBA(img), newWidth, newHeight)
+        scaledImg = _backend.newImage(newWidth, newHeight)
+        _putRGBA(scaledImg, newWidth, newHeight, rgba)
+        return scaledImg
+
     def _scale(self,scalingFactorX,scalingFactorY):
         """ Resizes the image by the given scalingFactor.
         
@@ -1544,25 +3613,21 @@ class Image(GraphicsObject):
         Also, the performance is unpredictable since it depends on the closest 
         usable rational fraction to the scaling ratio.  Scaling by simple factors
          like 2 or 3, or 1/2 or 1/3 will generally be fastest, and smaller images
-         will scale more quickly.        
+         will scale more quickly.  Images loaded from files are only scaled once
+         per scaling factor though, since the results are kept in Image.spriteCache.
         
         """
         self.scaleFactorX *= scalingFactorX
         self.scaleFactorY *= scalingFactorY
-        numX,denX = Image._chooseClosestUsableFraction(abs(self.scaleFactorX))
-        numY,denY = Image._chooseClosestUsableFraction(abs(self.scaleFactorY))
-        flipX = (self.scaleFactorX < 0)
-        flipY = (self.scaleFactorY < 0)
-        if numX == 1 and denX == 1 and numY == 1 and denY == 1:
-            self.img = self.originalSizeImage
-        elif numX == 1 and numY == 1:
-            self.img = self.originalSizeImage.subsample(denX, denY)
-        elif denX == 1 and denY == 1:
-            self.img = self.originalSizeImage.zoom(numX, numY)
+        if self._img is None:
+            return # not decoded yet: the scaling will happen then (all at once)
+        if self.sourceFile is not None:
+            self.img = Image.spriteCache.getSprite(self.sourceFile, self.scaleFactorX, self.scaleFactorY)
+            self.possiblyUsingSharedCacheImage = True
         else:
-            self.img = self.originalSizeImage.zoom(numX,numY).subsample(denX,denY)
-        
-        self.img=Image._tkFlip(self.img,flipX,flipY)
+            self.img = Image._scalePhotoImage(self.originalSizeImage, self.scaleFactorX, self.scaleFactorY)
+            if self.scaleFactorX < 0 or self.scaleFactorY < 0:
+                self.possiblyUsingSharedCacheImage = True # flipped images are shared through Image._flipCache
         
         if self.canvas and not self.canvas.isClosed():
             # update img reference, so even if this object gets GC'd, canvas can still draw it
@@ -1570,11 +3635,156 @@ class Image(GraphicsObject):
             self.canvas.itemconfig(self.id, image=self.img)
 
         
+##########################################################################
+# Pixel data helpers.  Pixel data is kept as a bytearray of RGBA values,
+#  4 bytes per pixel, row by row.
+
+def _copyPhotoImage(img, zoom=None, subsample=None):
+    """returns a new copy of the photo image, zoomed and/or subsampled"""
+    copy = _backend.newImage()
+    _backend.copyImage(copy, img, zoom=zoom, subsample=subsample)
+    return copy
+
+def _photoImageToRGBA(img):
+    """returns the RGBA pixel data of a tk PhotoImage.  Tk only hands out
+    colors, so the image is read blended over black and over white: how much
+    of the white shows through gives each pixel's alpha."""
+    overBlack = _backend.getRGB(img, background="#000000")
+    overWhite = _backend.getRGB(img, background="#ffffff")
+    pixelCount = len(overBlack) // 3
+    rgba = bytearray(pixelCount * 4)
+    for channel in range(3):
+        rgba[channel::4] = overBlack[channel::3]
+    alphas = bytes(min(255, 255 - white + black) for white, black in zip(overWhite[1::3], overBlack[1::3]))
+    rgba[3::4] = alphas
+    # blended over black, partly transparent pixels came out darker: undo that
+    for partial in _re.finditer(b"[\x01-\xfe]", alphas):
+        i, alpha = partial.start() * 4, alphas[partial.start()]
+        for channel in range(3):
+            rgba[i + channel] = min(255, rgba[i + channel] * 255 // alpha)
+    return rgba
+
+def _putRGBA(img, width, height, rgba):
+    """writes RGBA pixel data into a tk PhotoImage: the colors with one Tk call,
+    then marks the pixels that are mostly transparent (Tk's transparency is
+    all or nothing)"""
+    rgb = bytearray(width * height * 3)
+    for channel in range(3):
+        rgb[channel::3] = rgba[channel::4]
+    _backend.putRGB(img, 0, 0, width, height, rgb)
+    for transparent in _re.finditer(b"[\x00-\x7f]", bytes(rgba[3::4])):
+        y, x = divmod(transparent.start(), width)
+        _backend.setTransparent(img, x, y)
+
+def _areaResize(width, height, rgba, newWidth, newHeight):
+    """shrinks RGBA pixel data by averaging the block of pixels behind each new pixel"""
+    xBounds = [x * width // newWidth for x in range(newWidth + 1)]
+    yBounds = [y * height // newHeight for y in range(newHeight + 1)]
+    if _numpy is not None:
+        pixels = _numpy.frombuffer(bytes(rgba), dtype=_numpy.uint8).reshape(height, width, 4).astype(_numpy.uint32)
+        sums = _numpy.add.reduceat(_numpy.add.reduceat(pixels, yBounds[:-1], axis=0), xBounds[:-1], axis=1)
+        counts = _numpy.outer(_numpy.diff(yBounds), _numpy.diff(xBounds))[:, :, None]
+        return bytearray((sums // counts).astype(_numpy.uint8).tobytes())
+
+    # first add up each row's blocks (slicing with a step of 4 picks out one channel)...
+    rowSums = []
+    for y in range(height):
+        row = rgba[y*width*4:(y+1)*width*4]
+        sums = []
+        for x in range(newWidth):
+            start, end = xBounds[x] * 4, xBounds[x+1] * 4
+            sums.extend((sum(row[start:end:4]), sum(row[start+1:end:4]),
+                         sum(row[start+2:end:4]), sum(row[start+3:end:4])))
+        rowSums.append(sums)
+    # ... then add up the rows of each block, and divide by the block sizes
+    blockWidths = [xBounds[x+1] - xBounds[x] for x in range(newWidth) for _ in range(4)]
+    result = bytearray()
+    for y in range(newHeight):
+        blockHeight = yBounds[y+1] - yBounds[y]
+        totals = map(sum, zip(*rowSums[yBounds[y]:yBounds[y+1]]))
+        result.extend(total // (blockWidth * blockHeight) for total, blockWidth in zip(totals, blockWidths))
+    return result
+
+def memory_report():
+    """Returns a dictionary describing the tk PhotoImages that graphics2 is
+    keeping alive: "images" is a list (biggest first) with each image's name,
+    width, height, bytes (4 per pixel) and what is using it, and "totalBytes"
+    adds them all up.  Images that aren't drawn are only listed after
+    Image.pixelStore.trackImages()."""
+    found = {} # id(photo) -> entry
+    def note(photo, user):
+        if photo is None: return
+        entry = found.get(id(photo))
+        if entry is None:
+            entry = found[id(photo)] = {"name": str(photo), "width": photo.width(), "height": photo.height(),
+                                        "bytes": photo.width() * photo.height() * 4, "usedBy": []}
+        if user not in entry["usedBy"]:
+            entry["usedBy"].append(user)
+    for filename, photo in list(Image.fileCache._images.items()):
+        note(photo, "fileCache: " + filename)
+    for key, photo in list(Image.spriteCache._sprites.items()):
+        note(photo, "spriteCache: " + key[0])
+    for flips in list(Image._flipCache.values()):
+        for photo in flips.values():
+            note(photo, "flipCache")
+    for imageId, photo in list(Image.imageCache.items()):
+        note(photo, "drawn Image #{}".format(imageId))
+    for image in list(Image.pixelStore._images or ()):
+        note(image._img, "Image #{}".format(image.imageId))
+        if image.originalSizeImage is not image._img:
+            note(image.originalSizeImage, "Image #{} (original size)".format(image.imageId))
+    for win in list(_openWindows):
+        for photo in win._resources:
+            note(photo, "window resource: " + win.master.title())
+    images = sorted(found.values(), key=lambda entry: -entry["bytes"])
+    return {"images": images, "totalBytes": sum(entry["bytes"] for entry in images)}
+
 def color_rgb(r,g,b):
     """r,g,b are intensities of red, green, and blue in range(256)
     Returns color specifier string for the resulting color"""
     return "#%02x%02x%02x" % (r,g,b)
 
+def _benchmarkScaling(repeats=2000):
+    """prints how long it takes to choose the scaling fraction for a few typical
+    scaling factors (with a plain linear search vs. Image's lookup), and how many
+    intermediate pixels the zoom/subsample plans create"""
+    factors = [0.09, 0.13, 0.3, 0.45, 0.77, 1.5, 2.2, 3.7]
+    floats,fractions = Image._generateFractionLookupTable(20,40)
+
+    start = _time.perf_counter()
+    for _ in range(repeats):
+        for factor in factors:
+            fractions[min(range(len(floats)), key = lambda i: abs(floats[i]-factor))]
+    linearTime = _time.perf_counter() - start
+
+    start = _time.perf_counter()
+    for _ in range(repeats):
+        Image._chooseClosestUsableFraction.cache_clear()
+        for factor in factors:
+            Image._chooseClosestUsableFraction(factor)
+    bisectTime = _time.perf_counter() - start
+
+    start = _time.perf_counter()
+    for _ in range(repeats):
+        for factor in factors:
+            Image._chooseClosestUsableFraction(factor)
+    memoTime = _time.perf_counter() - start
+
+    lookups = repeats * len(factors)
+    print("fraction lookup: linear %.2f us, bisect %.2f us, remembered %.2f us" %
+          (linearTime / lookups * 1e6, bisectTime / lookups * 1e6, memoTime / lookups * 1e6))
+    for factor in factors:
+        num,den = Image._chooseClosestUsableFraction(factor)
+        plan = Image._chooseScalePlan(factor)
+        accuratePlan = Image._chooseScalePlan(factor, True)
+        accurateRatio = 1.0
+        for n,d in accuratePlan:
+            accurateRatio *= n/d
+        print("%5.2f: %d/%d (cost %.2f, error %.4f) -> %s (cost %.2f); accurate %s (cost %.2f, error %.4f)" %
+              (factor, num, den, Image._planCost(((num,den),)), abs(num/den - factor),
+               plan, Image._planCost(plan), accuratePlan, Image._planCost(accuratePlan),
+               abs(accurateRatio - factor)))
+
 def _test():
     win = GraphWin("Test", 800, 800)
     win.setCoords(0,0,10,10)
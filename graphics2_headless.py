@@ -0,0 +1,886 @@
+# graphics2_headless.py
+
+# pylint: disable-all
+# flake8: noqa
+# mypy: ignore-errors
+
+"""The "headless" backend for graphics2, which runs without a display.
+
+graphics2 uses it when GRAPHICS2_BACKEND=headless is set, or when Tk can't
+open a display.  HeadlessBackend provides the same backend interface as
+graphics2's Tk backend (see graphics2._TkBackend), but keeps everything in
+memory: canvas items are only recorded (in stacking order), images aren't
+decoded or scaled until somebody looks at their pixels, and waiting for a
+timer skips straight ahead instead of sleeping.  GraphWin.rasterize() draws
+a window's items into an image on demand (text and Entry boxes are left out).
+"""
+
+import time as _time
+import os as _os
+import math as _math
+import re as _re
+import struct as _struct
+import zlib as _zlib
+import heapq as _heapq
+import collections as _collections
+import weakref as _weakref
+
+
+class HeadlessError(Exception):
+    """Raised where Tk would raise a TclError (e.g. for an unknown color name)"""
+    pass
+
+
+class _EventLoop:
+
+    """Timers and idle callbacks for the headless backend.  Time passes as
+    usual, except that when the program is only waiting for a timer, the
+    clock skips straight ahead to it."""
+
+    def __init__(self):
+        self._timers = [] # heap of (due time, sequence number, id, callback)
+        self._idle = _collections.deque() # (id, callback)
+        self._cancelled = set()
+        self._count = 0
+        self._skipped = 0.0
+        self.noInputError = HeadlessError # raised when waiting for something that can't happen
+
+    def now(self):
+        return _time.time() + self._skipped
+
+    def after(self, ms, callback):
+        self._count += 1
+        afterId = "after#{}".format(self._count)
+        _heapq.heappush(self._timers, (self.now() + ms / 1000, self._count, afterId, callback))
+        return afterId
+
+    def afterIdle(self, callback):
+        self._count += 1
+        afterId = "after#{}".format(self._count)
+        self._idle.append((afterId, callback))
+        return afterId
+
+    def cancel(self, afterId):
+        self._cancelled.add(afterId)
+
+    def sleep(self, seconds):
+        self._skipped += max(0, seconds)
+
+    def runIdle(self):
+        """runs the idle callbacks (but not the ones they schedule); returns True if any ran"""
+        ran = False
+        for _ in range(len(self._idle)):
+            afterId, callback = self._idle.popleft()
+            if afterId in self._cancelled:
+                self._cancelled.discard(afterId)
+            else:
+                callback()
+                ran = True
+        return ran
+
+    def runPending(self):
+        """runs the idle callbacks and the timers that are due; returns True if any ran"""
+        ran = self.runIdle()
+        now = self.now()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, afterId, callback = _heapq.heappop(self._timers)
+            if afterId in self._cancelled:
+                self._cancelled.discard(afterId)
+            else:
+                callback()
+                ran = True
+        return self.runIdle() or ran
+
+    def waitUntil(self, isDone):
+        """runs callbacks (skipping ahead to timers) until isDone() returns True"""
+        while not isDone():
+            if self.runPending():
+                continue
+            while self._timers and self._timers[0][2] in self._cancelled:
+                self._cancelled.discard(_heapq.heappop(self._timers)[2])
+            if not self._timers:
+                raise self.noInputError("waiting for input that will never come: headless windows have no user "
+                                        "(use GraphWin.simulateClick() or simulateKey())")
+            self._skipped += max(0, self._timers[0][0] - self.now())
+
+_loop = _EventLoop()
+
+
+##########################################################################
+# Widgets: stand-ins for the tkinter widgets GraphWin, Text and Entry use
+
+class _Variable:
+
+    _default = None
+
+    def __init__(self, master=None, value=None, name=None):
+        self._value = self._default if value is None else value
+        self._version = 0 # changes on every set(), for wait_variable()
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        self._version += 1
+
+class _IntVar(_Variable):
+    _default = 0
+
+class _StringVar(_Variable):
+    _default = ""
+
+
+class _Widget:
+
+    """Stand-in for a tkinter widget: it just remembers its options"""
+
+    def __init__(self, master=None, cnf={}, **kw):
+        self.master = master
+        self._options = dict(cnf, **kw)
+        self._destroyed = False
+
+    def config(self, cnf=None, **kw):
+        self._options.update(cnf or {}, **kw)
+
+    configure = config
+
+    def cget(self, option):
+        return self._options.get(option, "")
+
+    def pack(self, *args, **kw): pass
+    def focus_set(self): pass
+    def bind(self, sequence=None, func=None, add=None): pass
+    def bind_all(self, sequence=None, func=None, add=None): pass
+
+    def update(self):
+        _loop.runPending()
+
+    def update_idletasks(self):
+        _loop.runIdle()
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            _loop.sleep(ms / 1000)
+            return None
+        return _loop.after(ms, lambda: func(*args))
+
+    def after_idle(self, func, *args):
+        return _loop.afterIdle(lambda: func(*args))
+
+    def after_cancel(self, afterId):
+        _loop.cancel(afterId)
+
+    def wait_variable(self, variable):
+        version = variable._version
+        _loop.waitUntil(lambda: variable._version != version)
+
+    def destroy(self):
+        self._destroyed = True
+
+class _Toplevel(_Widget):
+
+    def __init__(self, master=None, cnf={}, **kw):
+        _Widget.__init__(self, master, cnf, **kw)
+        self._title = ""
+
+    def title(self, string=None):
+        if string is None:
+            return self._title
+        self._title = string
+
+    def protocol(self, name=None, func=None): pass
+    def resizable(self, width=None, height=None): pass
+    def geometry(self, newGeometry=None): pass
+    def withdraw(self): pass
+    def lift(self, aboveThis=None): pass
+
+class _Entry(_Widget):
+
+    def get(self):
+        variable = self._options.get("textvariable")
+        return variable.get() if variable is not None else ""
+
+class _Font:
+
+    def __init__(self, root=None, font=None, name=None, exists=False, **options):
+        self._size = abs(int(options.get("size", 12)))
+
+    def measure(self, text, displayof=None):
+        return len(text) * self._size
+
+
+class _Canvas(_Widget):
+
+    """Stand-in for a tkinter Canvas, which records its items instead of showing them"""
+
+    def __init__(self, master=None, cnf={}, **kw):
+        _Widget.__init__(self, master, cnf, **kw)
+        self._items = {} # id -> [kind, coords, options, tags], in stacking order (bottom first)
+        self._lastId = 0
+
+    def _create(self, kind, args, kw):
+        coords, options = [], {}
+        for arg in args:
+            if isinstance(arg, dict):
+                options.update(arg)
+            elif isinstance(arg, (list, tuple)):
+                coords.extend(arg)
+            else:
+                coords.append(arg)
+        options.update(kw)
+        tags = options.pop("tags", ())
+        self._lastId += 1
+        self._items[self._lastId] = [kind, [float(c) for c in coords], options, set(_tagList(tags))]
+        return self._lastId
+
+    def create_line(self, *args, **kw): return self._create("line", args, kw)
+    def create_rectangle(self, *args, **kw): return self._create("rectangle", args, kw)
+    def create_oval(self, *args, **kw): return self._create("oval", args, kw)
+    def create_polygon(self, *args, **kw): return self._create("polygon", args, kw)
+    def create_text(self, *args, **kw): return self._create("text", args, kw)
+    def create_image(self, *args, **kw): return self._create("image", args, kw)
+    def create_window(self, *args, **kw): return self._create("window", args, kw)
+
+    def _find(self, tagOrId):
+        if isinstance(tagOrId, int) or (isinstance(tagOrId, str) and tagOrId.isdigit()):
+            return [int(tagOrId)] if int(tagOrId) in self._items else []
+        if tagOrId == "all":
+            return list(self._items)
+        return [itemId for itemId, item in self._items.items() if tagOrId in item[3]]
+
+    def find_withtag(self, tagOrId):
+        return tuple(self._find(tagOrId))
+
+    def find_all(self):
+        return tuple(self._items)
+
+    def gettags(self, tagOrId):
+        found = self._find(tagOrId)
+        return tuple(self._items[found[0]][3]) if found else ()
+
+    def type(self, tagOrId):
+        found = self._find(tagOrId)
+        return self._items[found[0]][0] if found else None
+
+    def delete(self, *tagsOrIds):
+        for tagOrId in tagsOrIds:
+            for itemId in self._find(tagOrId):
+                del self._items[itemId]
+
+    def coords(self, tagOrId, *args):
+        found = self._find(tagOrId)
+        if not args:
+            return list(self._items[found[0]][1]) if found else []
+        coords = []
+        for arg in args:
+            if isinstance(arg, (list, tuple)):
+                coords.extend(arg)
+            else:
+                coords.append(arg)
+        if found:
+            self._items[found[0]][1] = [float(c) for c in coords]
+
+    def move(self, tagOrId, dx, dy):
+        for itemId in self._find(tagOrId):
+            coords = self._items[itemId][1]
+            coords[0::2] = [x + dx for x in coords[0::2]]
+            coords[1::2] = [y + dy for y in coords[1::2]]
+
+    def itemconfig(self, tagOrId, cnf=None, **kw):
+        options = dict(cnf or {}, **kw)
+        tags = options.pop("tags", None)
+        for itemId in self._find(tagOrId):
+            self._items[itemId][2].update(options)
+            if tags is not None:
+                self._items[itemId][3] = set(_tagList(tags))
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, tagOrId, option):
+        found = self._find(tagOrId)
+        return self._items[found[0]][2].get(option, "") if found else ""
+
+    def addtag_withtag(self, newTag, tagOrId):
+        for itemId in self._find(tagOrId):
+            self._items[itemId][3].add(newTag)
+
+    def dtag(self, tagOrId, tagToDelete=None):
+        for itemId in self._find(tagOrId):
+            self._items[itemId][3].discard(tagToDelete or tagOrId)
+
+    def tag_raise(self, tagOrId, aboveThis=None):
+        self._restack(tagOrId, aboveThis, True)
+
+    def tag_lower(self, tagOrId, belowThis=None):
+        self._restack(tagOrId, belowThis, False)
+
+    lift = tag_raise
+    lower = tag_lower
+
+    def _restack(self, tagOrId, reference, above):
+        moving = self._find(tagOrId)
+        if not moving:
+            return
+        movingSet = set(moving)
+        rest = [itemId for itemId in self._items if itemId not in movingSet]
+        if reference is None:
+            order = rest + moving if above else moving + rest
+        else:
+            referenceSet = set(self._find(reference))
+            positions = [i for i, itemId in enumerate(rest) if itemId in referenceSet]
+            if not positions:
+                raise HeadlessError("tagOrId \"{}\" doesn't match any items".format(reference))
+            position = positions[-1] + 1 if above else positions[0]
+            order = rest[:position] + moving + rest[position:]
+        self._items = {itemId: self._items[itemId] for itemId in order}
+
+    def _rasterize(self):
+        """returns a new photo image with all the visible items drawn into it"""
+        background = self._options.get("bg") or self._options.get("background") or "#d9d9d9"
+        raster = _Raster(int(self._options.get("width", 0)), int(self._options.get("height", 0)),
+                         _rgbOf(background))
+        for kind, coords, options, _ in list(self._items.values()):
+            if options.get("state") != "hidden":
+                raster.drawItem(kind, coords, options)
+        image = _PhotoImage(raster.width, raster.height)
+        image._version = _Pixels(raster.width, raster.height, pixels=raster.pixels)
+        return image
+
+def _tagList(tags):
+    return tags.split() if isinstance(tags, str) else list(tags)
+
+
+_COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0), "green": (0, 255, 0),
+    "blue": (0, 0, 255), "yellow": (255, 255, 0), "cyan": (0, 255, 255), "magenta": (255, 0, 255),
+    "purple": (160, 32, 240), "orange": (255, 165, 0), "pink": (255, 192, 203), "brown": (165, 42, 42),
+    "gray": (190, 190, 190), "grey": (190, 190, 190), "lightgray": (211, 211, 211),
+    "lightgrey": (211, 211, 211), "darkgray": (169, 169, 169), "darkgrey": (169, 169, 169),
+    "darkgreen": (0, 100, 0), "darkblue": (0, 0, 139), "darkred": (139, 0, 0), "navy": (0, 0, 128),
+    "gold": (255, 215, 0), "silver": (192, 192, 192), "maroon": (176, 48, 96), "violet": (238, 130, 238),
+    "lightblue": (173, 216, 230), "lightgreen": (144, 238, 144), "tan": (210, 180, 140),
+}
+
+def _rgbOf(color):
+    """returns (r,g,b) for a Tk color name or "#rgb"/"#rrggbb" string, or None for "" (no color)"""
+    if not color:
+        return None
+    color = str(color).strip()
+    if color.startswith("#") and len(color) in (4, 7, 10, 13):
+        digits = len(color[1:]) // 3
+        try:
+            return tuple(int(color[1 + i * digits:1 + (i + 1) * digits], 16) * 255 // (16 ** digits - 1)
+                         for i in range(3))
+        except ValueError:
+            pass
+    rgb = _COLORS.get(color.lower().replace(" ", ""))
+    if rgb is None:
+        raise HeadlessError("unknown color name \"{}\"".format(color))
+    return rgb
+
+
+class _Raster:
+
+    """Draws canvas items into RGBA pixels (4 bytes per pixel, row by row).
+    Text and embedded widgets are not drawn."""
+
+    def __init__(self, width, height, background):
+        self.width, self.height = width, height
+        self.pixels = bytearray(bytes(background + (255,)) * (width * height))
+
+    def drawItem(self, kind, coords, options):
+        if kind == "rectangle":
+            self.rectangle(coords, _rgbOf(options.get("fill")),
+                           _rgbOf(options.get("outline", "black")), float(options.get("width", 1)))
+        elif kind == "oval":
+            self.oval(coords, _rgbOf(options.get("fill")),
+                      _rgbOf(options.get("outline", "black")), float(options.get("width", 1)))
+        elif kind == "polygon":
+            points = list(zip(coords[0::2], coords[1::2]))
+            self.polygon(points, _rgbOf(options.get("fill", "black")))
+            outline = _rgbOf(options.get("outline"))
+            if outline is not None:
+                self.line(points + points[:1], float(options.get("width", 1)), outline)
+        elif kind == "line":
+            self.line(list(zip(coords[0::2], coords[1::2])), float(options.get("width", 1)),
+                      _rgbOf(options.get("fill", "black")))
+        elif kind == "image":
+            photo = options.get("image")
+            if isinstance(photo, str):
+                photo = _PhotoImage._images.get(photo)
+            if photo is not None:
+                self.image(coords[0], coords[1], photo, options.get("anchor", "center"))
+
+    def span(self, y, x1, x2, color):
+        """fills the pixels x1 <= x < x2 of row y"""
+        if color is None or not 0 <= y < self.height:
+            return
+        x1, x2 = max(int(x1), 0), min(int(x2), self.width)
+        if x1 < x2:
+            start = (y * self.width + x1) * 4
+            self.pixels[start:start + (x2 - x1) * 4] = bytes(color + (255,)) * (x2 - x1)
+
+    def box(self, x1, y1, x2, y2, color):
+        for y in range(max(int(y1), 0), min(int(y2), self.height)):
+            self.span(y, x1, x2, color)
+
+    def rectangle(self, coords, fill, outline, width):
+        x1, x2 = sorted((round(coords[0]), round(coords[2])))
+        y1, y2 = sorted((round(coords[1]), round(coords[3])))
+        self.box(x1, y1, x2, y2, fill)
+        if outline is not None:
+            w = max(round(width), 1)
+            self.box(x1, y1, x2 + 1, y1 + w, outline)
+            self.box(x1, y2 + 1 - w, x2 + 1, y2 + 1, outline)
+            self.box(x1, y1, x1 + w, y2 + 1, outline)
+            self.box(x2 + 1 - w, y1, x2 + 1, y2 + 1, outline)
+
+    @staticmethod
+    def _ellipseHalfWidth(a, b, dy):
+        if a <= 0 or b <= 0 or abs(dy) >= b:
+            return None
+        return a * _math.sqrt(1 - (dy / b) ** 2)
+
+    def oval(self, coords, fill, outline, width):
+        cx, cy = (coords[0] + coords[2]) / 2, (coords[1] + coords[3]) / 2
+        a, b = abs(coords[2] - coords[0]) / 2, abs(coords[3] - coords[1]) / 2
+        w = max(round(width), 1) if outline is not None else 0
+        for y in range(max(int(cy - b), 0), min(int(cy + b) + 1, self.height)):
+            outer = self._ellipseHalfWidth(a, b, y + 0.5 - cy)
+            if outer is None:
+                continue
+            inner = self._ellipseHalfWidth(a - w, b - w, y + 0.5 - cy) if w else outer
+            if inner is not None:
+                self.span(y, round(cx - inner), round(cx + inner), fill)
+            else:
+                inner = 0
+            if w:
+                self.span(y, round(cx - outer), round(cx - inner), outline)
+                self.span(y, round(cx + inner), round(cx + outer), outline)
+
+    def polygon(self, points, color):
+        """fills the polygon (even-odd rule) one row at a time"""
+        if color is None or len(points) < 3:
+            return
+        ys = [y for _, y in points]
+        edges = list(zip(points, points[1:] + points[:1]))
+        for y in range(max(int(min(ys)), 0), min(int(max(ys)) + 1, self.height)):
+            center = y + 0.5
+            xs = sorted(xa + (center - ya) * (xb - xa) / (yb - ya)
+                        for (xa, ya), (xb, yb) in edges if ya <= center < yb or yb <= center < ya)
+            for x1, x2 in zip(xs[0::2], xs[1::2]):
+                self.span(y, round(x1), round(x2), color)
+
+    def line(self, points, width, color):
+        if color is None:
+            return
+        w = max(round(width), 1)
+        for (xa, ya), (xb, yb) in zip(points, points[1:]):
+            steps = max(int(max(abs(xb - xa), abs(yb - ya))), 1)
+            for step in range(steps + 1):
+                x = round(xa + (xb - xa) * step / steps - (w - 1) / 2)
+                y = round(ya + (yb - ya) * step / steps - (w - 1) / 2)
+                self.box(x, y, x + w, y + w, color)
+
+    def image(self, x, y, photo, anchor):
+        width, height = photo.width(), photo.height()
+        anchor = "" if anchor == "center" else anchor
+        left = round(x) if "w" in anchor else round(x) - width if "e" in anchor else round(x) - width // 2
+        top = round(y) if "n" in anchor else round(y) - height if "s" in anchor else round(y) - height // 2
+        _pasteRGBA(self.pixels, self.width, self.height, photo._version.get(), width, height, left, top, True)
+
+
+##########################################################################
+# Images.  Pixel data is kept as a bytearray of RGBA values, 4 bytes per
+#  pixel, row by row.
+
+class _Pixels:
+
+    """One version of a headless photo image's pixels: either already worked
+    out (pixels: RGBA bytes) or described as an operation applied to an
+    earlier version (parent).  That way nothing gets decoded, scaled or copied
+    until somebody actually needs the pixels."""
+
+    __slots__ = ("width", "height", "parent", "operation", "pixels", "shared")
+
+    def __init__(self, width, height, parent=None, operation=None, pixels=None):
+        self.width, self.height = width, height
+        self.parent = parent
+        self.operation = operation # function(pixels, width, height) that changes pixels in place
+        self.pixels = pixels
+        self.shared = False # True once another image's operation depends on this version
+
+    def get(self):
+        """returns the RGBA pixels (working them out first if needed)"""
+        if self.pixels is None:
+            chain = []
+            version = self
+            while version is not None and version.pixels is None:
+                chain.append(version)
+                version = version.parent
+            if version is None:
+                pixels, width, height = bytearray(), 0, 0
+            else:
+                pixels, width, height = bytearray(version.pixels), version.width, version.height
+            for step in reversed(chain):
+                pixels = _resizeRGBA(pixels, width, height, step.width, step.height)
+                width, height = step.width, step.height
+                if step.operation is not None:
+                    step.operation(pixels, width, height)
+            self.pixels = pixels
+            self.parent = None
+            self.operation = None
+        return self.pixels
+
+def _resizeRGBA(pixels, width, height, newWidth, newHeight):
+    """returns the pixels cropped/padded (with transparent pixels) to the new size"""
+    if (width, height) == (newWidth, newHeight):
+        return pixels
+    resized = bytearray(newWidth * newHeight * 4)
+    rowBytes = min(width, newWidth) * 4
+    for y in range(min(height, newHeight)):
+        resized[y * newWidth * 4:y * newWidth * 4 + rowBytes] = pixels[y * width * 4:y * width * 4 + rowBytes]
+    return resized
+
+def _pasteRGBA(pixels, width, height, block, blockWidth, blockHeight, x, y, overlay):
+    """copies block into pixels with its top left corner at (x,y), either blending
+    it over the pixels by its alpha values (overlay) or replacing them"""
+    x1, x2 = max(x, 0), min(x + blockWidth, width)
+    if x1 >= x2:
+        return
+    count = (x2 - x1) * 4
+    for row in range(max(0, -y), min(blockHeight, height - y)):
+        source = (row * blockWidth + x1 - x) * 4
+        target = ((y + row) * width + x1) * 4
+        segment = block[source:source + count]
+        alphas = segment[3::4]
+        if not overlay or alphas.count(255) == len(alphas) or not any(pixels[target + 3:target + count:4]):
+            pixels[target:target + count] = segment
+            continue
+        # copy the opaque runs as they are, and blend the (usually few) other pixels
+        opaqueStart = 0
+        for run in _re.finditer(b"[^\xff]+", bytes(alphas)):
+            start, end = run.start() * 4, run.end() * 4
+            pixels[target + opaqueStart:target + start] = segment[opaqueStart:start]
+            opaqueStart = end
+            for i in range(start, end, 4):
+                alpha = segment[i + 3]
+                if alpha:
+                    for c in range(3):
+                        pixels[target + i + c] = (segment[i + c] * alpha + pixels[target + i + c] * (255 - alpha)) // 255
+                    pixels[target + i + 3] = alpha + pixels[target + i + 3] * (255 - alpha) // 255
+        pixels[target + opaqueStart:target + count] = segment[opaqueStart:]
+
+def _takeRGBA(pixels, width, x1, y1, x2, y2, subsampleX=1, subsampleY=1, zoomX=1, zoomY=1):
+    """returns (block, blockWidth, blockHeight): the pixels in the rectangle
+    (x1,y1)-(x2,y2), subsampled and then zoomed (negative subsampling mirrors them)"""
+    view = memoryview(pixels).cast("I") if pixels else None
+    rows = []
+    for y in range(y1, y2)[::subsampleY]:
+        row = view[y * width + x1:y * width + x2][::subsampleX].tobytes()
+        if zoomX != 1:
+            row = b"".join(row[i:i + 4] * zoomX for i in range(0, len(row), 4))
+        rows.extend([row] * zoomY)
+    blockWidth = len(range(x1, x2)[::subsampleX]) * zoomX
+    return b"".join(rows), blockWidth, len(rows)
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def _decodePNG(data):
+    """returns (width, height, rgba) for the contents of a PNG file (only 8 bits
+    per channel, non-interlaced PNGs are supported).  With the Tk backend, Tk
+    decodes the image files instead."""
+    if not data.startswith(_PNG_SIGNATURE):
+        raise HeadlessError("couldn't recognize image data")
+    pos = len(_PNG_SIGNATURE)
+    compressed = []
+    palette = transparency = None
+    while pos < len(data):
+        length, kind = _struct.unpack(">I4s", data[pos:pos+8])
+        chunk = data[pos+8:pos+8+length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            width, height, bitDepth, colorType, _, _, interlace = _struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            transparency = chunk
+        elif kind == b"IDAT":
+            compressed.append(chunk)
+        elif kind == b"IEND":
+            break
+    if bitDepth != 8 or interlace != 0 or colorType not in (0, 2, 3, 4, 6):
+        raise HeadlessError("the headless backend doesn't support this kind of PNG file")
+
+    bytesPerPixel = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[colorType]
+    stride = width * bytesPerPixel
+    raw = _zlib.decompress(b"".join(compressed))
+    pixels = bytearray(height * stride)
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        filterType = raw[start]
+        line = bytearray(raw[start+1:start+1+stride])
+        if filterType == 1: # sub
+            for i in range(bytesPerPixel, stride):
+                line[i] = (line[i] + line[i-bytesPerPixel]) & 255
+        elif filterType == 2: # up
+            line = bytearray([(a + b) & 255 for a, b in zip(line, previous)])
+        elif filterType == 3: # average
+            for i in range(stride):
+                left = line[i-bytesPerPixel] if i >= bytesPerPixel else 0
+                line[i] = (line[i] + ((left + previous[i]) >> 1)) & 255
+        elif filterType == 4: # paeth
+            for i in range(stride):
+                if i >= bytesPerPixel:
+                    a, c = line[i-bytesPerPixel], previous[i-bytesPerPixel]
+                else:
+                    a = c = 0
+                b = previous[i]
+                pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2*c)
+                line[i] = (line[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 255
+        pixels[y*stride:(y+1)*stride] = line
+        previous = line
+
+    pixelCount = width * height
+    rgba = bytearray(pixelCount * 4)
+    rgba[3::4] = b"\xff" * pixelCount
+    if colorType == 6:
+        rgba[:] = pixels
+    elif colorType == 2:
+        for channel in range(3):
+            rgba[channel::4] = pixels[channel::3]
+    elif colorType in (0, 4):
+        gray = pixels[0::bytesPerPixel]
+        for channel in range(3):
+            rgba[channel::4] = gray
+        if colorType == 4:
+            rgba[3::4] = pixels[1::2]
+    else: # palette: look up each channel with bytes.translate
+        palette = palette + bytes(768 - len(palette))
+        for channel in range(3):
+            rgba[channel::4] = pixels.translate(palette[channel::3])
+        if transparency is not None:
+            alphas = transparency + b"\xff" * (256 - len(transparency))
+            rgba[3::4] = pixels.translate(alphas)
+    return width, height, rgba
+
+def _encodePNG(width, height, rgba):
+    """returns the contents of a PNG file for the given RGBA pixel data"""
+    stride = width * 4
+    raw = b"".join(b"\x00" + bytes(rgba[y*stride:(y+1)*stride]) for y in range(height))
+    def chunk(kind, body):
+        return (_struct.pack(">I", len(body)) + kind + body +
+                _struct.pack(">I", _zlib.crc32(kind + body) & 0xffffffff))
+    return (_PNG_SIGNATURE +
+            chunk(b"IHDR", _struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) +
+            chunk(b"IDAT", _zlib.compress(raw, 1)) +
+            chunk(b"IEND", b""))
+
+def _decodePPM(data):
+    """returns (width, height, rgba) for a binary (P6) PPM image"""
+    fields = data.split(None, 4)
+    if len(fields) < 5 or fields[0] != b"P6":
+        raise HeadlessError("couldn't recognize image data")
+    width, height, maxValue = int(fields[1]), int(fields[2]), int(fields[3])
+    rgb = data[len(data) - width * height * 3:]
+    if maxValue != 255:
+        rgb = bytes(value * 255 // maxValue for value in rgb)
+    rgba = bytearray(b"\xff" * (width * height * 4))
+    for c in range(3):
+        rgba[c::4] = rgb[c::3]
+    return width, height, rgba
+
+
+class _PhotoImage:
+
+    """A headless photo image, which keeps its pixels in memory.  Like a tk
+    PhotoImage it has a name, width(), height(), get(x,y), blank() and
+    write(filename, format); everything else is done through HeadlessBackend."""
+
+    _images = _weakref.WeakValueDictionary() # name -> image (like Tk's image names)
+    _count = 0
+
+    def __init__(self, width=0, height=0):
+        _PhotoImage._count += 1
+        self.name = "pyimage{}".format(_PhotoImage._count)
+        _PhotoImage._images[self.name] = self
+        width, height = int(width), int(height)
+        # like Tk, images grow to fit what's put/copied into them, unless their size was given
+        self._fixedWidth, self._fixedHeight = width > 0, height > 0
+        self._version = _Pixels(width, height, pixels=bytearray(width * height * 4))
+
+    def _load(self, data):
+        data = bytes(data)
+        if data.startswith(_PNG_SIGNATURE):
+            width, height = _struct.unpack(">II", data[16:24])
+            def decode(pixels, width, height):
+                pixels[:] = _decodePNG(data)[2]
+        else:
+            width, height, rgba = _decodePPM(data)
+            def decode(pixels, width, height):
+                pixels[:] = rgba
+        self._version = _Pixels(width, height, operation=decode)
+
+    def __str__(self):
+        return self.name
+
+    def width(self):
+        return self._version.width
+
+    def height(self):
+        return self._version.height
+
+    def _change(self, operation, width=None, height=None):
+        """applies operation(pixels, width, height) to this image (now, if the
+        pixels are already worked out and nobody else depends on them, or
+        else when they're needed)"""
+        version = self._version
+        width = version.width if width is None else width
+        height = version.height if height is None else height
+        if version.pixels is not None and not version.shared and (width, height) == (version.width, version.height):
+            operation(version.pixels, width, height)
+        else:
+            self._version = _Pixels(width, height, parent=version, operation=operation)
+
+    def _grownSize(self, x2, y2):
+        width, height = self.width(), self.height()
+        if not self._fixedWidth: width = max(width, x2)
+        if not self._fixedHeight: height = max(height, y2)
+        return width, height
+
+    def _paste(self, block, blockWidth, blockHeight, x, y):
+        """replaces the pixels at (x,y) with the RGBA block (growing the image if needed)"""
+        block = bytes(block)
+        def paste(pixels, width, height):
+            _pasteRGBA(pixels, width, height, block, blockWidth, blockHeight, x, y, False)
+        self._change(paste, *self._grownSize(x + blockWidth, y + blockHeight))
+
+    def get(self, x, y):
+        x, y = int(x), int(y)
+        if not (0 <= x < self.width() and 0 <= y < self.height()):
+            raise HeadlessError("{} {} is outside image".format(x, y))
+        pixels = self._version.get()
+        i = (y * self.width() + x) * 4
+        return (pixels[i], pixels[i + 1], pixels[i + 2])
+
+    def blank(self):
+        self._version = _Pixels(self.width(), self.height(), pixels=bytearray(self.width() * self.height() * 4))
+
+    def write(self, filename, format=None, from_coords=None):
+        fileFormat = (format or _os.path.splitext(filename)[1][1:] or "png").lower()
+        width, height, pixels = self.width(), self.height(), self._version.get()
+        if fileFormat == "png":
+            data = _encodePNG(width, height, pixels)
+        elif fileFormat in ("ppm", "pnm"):
+            rgb = bytearray(width * height * 3)
+            for c in range(3):
+                rgb[c::3] = pixels[c::4]
+            data = "P6 {} {} 255\n".format(width, height).encode("ascii") + rgb
+        else:
+            raise HeadlessError("image file format \"{}\" is not supported".format(fileFormat))
+        with open(filename, "wb") as imageFile:
+            imageFile.write(data)
+
+
+##########################################################################
+# The backend
+
+class HeadlessBackend:
+
+    """The backend interface (see graphics2._TkBackend) implemented without a
+    display.  noInputError is the exception raised when the program waits for
+    input while nothing (no timer or simulated click) could ever provide it."""
+
+    name = "headless"
+    Error = HeadlessError
+    Tk = _Toplevel
+    Toplevel = _Toplevel
+    Canvas = _Canvas
+    Frame = _Widget
+    Entry = _Entry
+    StringVar = _StringVar
+    IntVar = _IntVar
+
+    def __init__(self, noInputError=HeadlessError):
+        _loop.noInputError = noInputError
+        self.root = None
+
+    def start(self):
+        self.root = _Toplevel()
+        return self.root
+
+    def now(self):
+        return _loop.now()
+
+    def font(self, **options):
+        return _Font(**options)
+
+    def newImage(self, width=0, height=0, master=None):
+        return _PhotoImage(width, height)
+
+    def loadImage(self, filename=None, data=None):
+        if filename is not None:
+            try:
+                with open(filename, "rb") as imageFile:
+                    data = imageFile.read()
+            except OSError as error:
+                raise HeadlessError("couldn't open \"{}\": {}".format(filename, error.strerror.lower()))
+        image = _PhotoImage()
+        image._load(data)
+        return image
+
+    def deleteImage(self, img):
+        _PhotoImage._images.pop(img.name, None)
+
+    def copyImage(self, target, source, region=None, to=None, zoom=None, subsample=None, overlay=True):
+        sourceVersion = source._version
+        sourceVersion.shared = True
+        x1, y1, x2, y2 = region or (0, 0, sourceVersion.width, sourceVersion.height)
+        subsampleX, subsampleY = subsample or (1, 1)
+        zoomX, zoomY = zoom or (1, 1)
+        x, y = to or (0, 0)
+        blockWidth = len(range(x1, x2)[::subsampleX]) * zoomX
+        blockHeight = len(range(y1, y2)[::subsampleY]) * zoomY
+        def copy(pixels, width, height):
+            block, _, _ = _takeRGBA(sourceVersion.get(), sourceVersion.width,
+                                    x1, y1, x2, y2, subsampleX, subsampleY, zoomX, zoomY)
+            _pasteRGBA(pixels, width, height, block, blockWidth, blockHeight, x, y, overlay)
+        target._change(copy, *target._grownSize(x + blockWidth, y + blockHeight))
+
+    def getRGB(self, img, region=None, background=None):
+        x1, y1, x2, y2 = region or (0, 0, img.width(), img.height())
+        block, blockWidth, blockHeight = _takeRGBA(img._version.get(), img.width(), x1, y1, x2, y2)
+        if background is not None: # blend the pixels over the background color
+            blended = bytearray(bytes(_rgbOf(background) + (255,)) * (blockWidth * blockHeight))
+            _pasteRGBA(blended, blockWidth, blockHeight, block, blockWidth, blockHeight, 0, 0, True)
+            block = blended
+        rgb = bytearray(len(block) // 4 * 3)
+        for c in range(3):
+            rgb[c::3] = block[c::4]
+        return rgb
+
+    def putRGB(self, img, x, y, width, height, rgb):
+        rgba = bytearray(b"\xff" * (width * height * 4))
+        for c in range(3):
+            rgba[c::4] = rgb[c::3]
+        img._paste(rgba, width, height, x, y)
+
+    def putColors(self, img, x, y, rows):
+        width = max(len(row) for row in rows)
+        rgba = bytearray(width * len(rows) * 4)
+        for rowNumber, row in enumerate(rows):
+            for column, color in enumerate(row):
+                i = (rowNumber * width + column) * 4
+                rgba[i:i + 4] = bytes(_rgbOf(color) + (255,))
+        img._paste(rgba, width, len(rows), x, y)
+
+    def setTransparent(self, img, x, y, transparent=True):
+        i = (int(y) * img.width() + int(x)) * 4 + 3
+        def setAlpha(pixels, width, height):
+            pixels[i] = 0 if transparent else 255
+        img._change(setAlpha)
+
+    def rasterize(self, canvas):
+        return canvas._rasterize()
@@ -0,0 +1,23 @@
+"""Shared setup for the tests: imports graphics2 with the headless backend"""
+
+import os
+import sys
+import unittest
+
+os.environ["GRAPHICS2_BACKEND"] = "headless" # before graphics2 is imported
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import graphics2 as g
+
+
+class HeadlessTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if g.getBackend() != "headless":
+            self.skipTest("graphics2 was already imported with the tk backend")
+        self.win = g.GraphWin("test", 200, 100)
+
+    def tearDown(self):
+        if hasattr(self, "win"):
+            self.win.close()
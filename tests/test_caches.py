@@ -0,0 +1,107 @@
+"""Tests for the image caches and the preloader"""
+
+import os
+import unittest
+
+from support import ROOT, HeadlessTestCase, g
+
+CARDS = [os.path.join(ROOT, "PNG-cards-1.3", name) for name in ("2_clubs.png", "3_hearts.png", "4_spades.png")]
+
+
+CARD_BYTES = 500 * 726 * 4 # decoded size of each card picture
+
+
+class ImageCacheTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = g.ImageCache(maxBytes=2 * CARD_BYTES)
+
+    def test_hits_and_misses(self):
+        image = self.cache.get(CARDS[0])
+        self.assertIs(self.cache.get(CARDS[0]), image)
+        stats = self.cache.getStats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, CARD_BYTES))
+
+    def test_byte_bound_evicts_least_recently_used(self):
+        self.cache.preload(CARDS[:2])
+        self.cache.get(CARDS[0]) # now the most recently used
+        self.cache.get(CARDS[2])
+        self.assertEqual([filename in self.cache for filename in CARDS], [True, False, True])
+        stats = self.cache.getStats()
+        self.assertEqual((stats["images"], stats["evictions"], stats["bytes"]), (2, 1, 2 * CARD_BYTES))
+
+    def test_pinned_images_stay(self):
+        self.cache.pin(CARDS[0])
+        for filename in CARDS[1:]:
+            self.cache.get(filename)
+        self.assertIn(CARDS[0], self.cache)
+        self.cache.clear()
+        self.assertEqual(self.cache.getStats()["images"], 1)
+        self.cache.unpin(CARDS[0])
+        self.cache.setMaxBytes(0)
+        self.assertNotIn(CARDS[0], self.cache)
+
+
+class SpriteCacheTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sprites = g.SpriteCache()
+
+    def test_images_share_sprites(self):
+        g.Image.spriteCache.clear()
+        first = g.Image(g.Point(50, 50), CARDS[0])
+        second = g.Image(g.Point(150, 50), CARDS[0])
+        for image in (first, second):
+            image._scale(0.1, 0.1)
+            image.draw(self.win)
+        self.assertIs(first.img, second.img)
+        self.assertEqual((first.getWidth(), first.getHeight()), (50, 73))
+        stats = g.Image.spriteCache.getStats()
+        self.assertEqual((stats["sprites"], stats["misses"], stats["hits"]), (1, 1, 1))
+
+    def test_flipped_sprites_are_kept_apart(self):
+        sprite = self.sprites.getSprite(CARDS[0], 0.1, 0.1)
+        flipped = self.sprites.getSprite(CARDS[0], -0.1, 0.1)
+        self.assertIsNot(sprite, flipped)
+        self.assertIs(self.sprites.getSprite(CARDS[0], 0.1000000001, 0.1), sprite) # (rounded)
+
+    def test_byte_bound_evicts_least_recently_used(self):
+        spriteBytes = 50 * 73 * 4
+        self.sprites.setMaxBytes(2 * spriteBytes)
+        first = self.sprites.getSprite(CARDS[0], 0.1, 0.1)
+        self.sprites.getSprite(CARDS[1], 0.1, 0.1)
+        self.sprites.getSprite(CARDS[0], 0.1, 0.1) # now the most recently used
+        self.sprites.getSprite(CARDS[0], -0.1, 0.1)
+        stats = self.sprites.getStats()
+        self.assertEqual((stats["sprites"], stats["evictions"], stats["bytes"]), (2, 1, 2 * spriteBytes))
+        self.assertIs(self.sprites.getSprite(CARDS[0], 0.1, 0.1), first) # CARDS[1] was evicted instead
+
+
+class ImagePreloaderTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        g.Image.spriteCache.clear()
+
+    def test_custom_cache(self):
+        cache = g.ImageCache()
+        misses = g.Image.fileCache.getStats()["misses"]
+        preloader = g.ImagePreloader(CARDS[:2], cache=cache, scaleFactors=[0.1])
+        preloader.wait()
+        self.assertEqual(preloader.getProgress(), (2, 2))
+        self.assertEqual(sorted(preloader.loaded), CARDS[:2])
+        self.assertTrue(all(filename in cache for filename in CARDS[:2]))
+        self.assertEqual(g.Image.spriteCache.getStats()["sprites"], 2)
+        # the sprites were built from the images just decoded, not decoded again
+        self.assertEqual(g.Image.fileCache.getStats()["misses"], misses)
+
+    def test_missing_file(self):
+        preloader = g.ImagePreloader([CARDS[0], "no such file.png"], cache=g.ImageCache())
+        preloader.wait()
+        self.assertEqual((preloader.loaded, preloader.failed), ([CARDS[0]], ["no such file.png"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
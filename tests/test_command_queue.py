@@ -0,0 +1,92 @@
+"""Tests for CommandQueue: running other threads' commands on the Tk thread"""
+
+import threading
+import time
+import unittest
+
+from support import HeadlessTestCase, g
+
+
+def inThread(function):
+    """Runs function on a new thread and returns its result (or raises its
+    exception)"""
+    result = []
+    def run():
+        try:
+            result.append((function(), None))
+        except Exception as e:
+            result.append((None, e))
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    value, error = result[0]
+    if error is not None:
+        raise error
+    return value
+
+
+class CommandQueueTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = g.CommandQueue(maxsize=2, timeout=0.05)
+
+    def tearDown(self):
+        self.queue.close()
+        super().tearDown()
+
+    def test_worker_submit_and_result(self):
+        results = []
+        def worker():
+            future = self.queue.submit(g.Point, 3, 4)
+            results.append(future.result(timeout=5).getX())
+        thread = threading.Thread(target=worker)
+        thread.start()
+        deadline = time.time() + 5
+        while thread.is_alive() and time.time() < deadline:
+            self.win.update()
+            time.sleep(0.001)
+        thread.join()
+        self.assertEqual(results, [3])
+        self.assertEqual(self.queue.getStats()["completed"], 1)
+
+    def test_polls_only_while_commands_wait(self):
+        self.assertIsNone(self.queue._afterId)
+        future = inThread(lambda: self.queue.submit(abs, -5))
+        self.assertIsNotNone(self.queue._afterId)
+        self.win.pause(0.1)
+        self.assertEqual(future.result(timeout=0), 5)
+        self.assertIsNone(self.queue._afterId) # idle again: nothing re-armed
+
+    def test_tk_thread_submit_runs_at_once(self):
+        future = self.queue.submit(abs, -2)
+        self.assertEqual(future.result(timeout=0), 2)
+
+    def test_backpressure(self):
+        inThread(lambda: self.queue.submit(abs, 1))
+        inThread(lambda: self.queue.submit(abs, 2))
+        with self.assertRaises(g.GraphicsError): # not queue.Full
+            inThread(lambda: self.queue.submit(abs, 3))
+        stats = self.queue.getStats()
+        self.assertEqual((stats["submitted"], stats["blockedSubmits"], stats["backlog"]), (2, 1, 2))
+        self.queue.runPending()
+        self.assertEqual(self.queue.getStats()["completed"], 2)
+
+    def test_run_pending_from_a_command(self):
+        ran = []
+        inThread(lambda: self.queue.submit(lambda: ran.append(self.queue.runPending())))
+        inThread(lambda: self.queue.submit(ran.append, "second"))
+        self.queue.runPending() # used to spin forever
+        self.assertEqual(ran, [None, "second"])
+
+    def test_close_cancels_waiting_commands(self):
+        future = inThread(lambda: self.queue.submit(abs, -1))
+        self.queue.close()
+        self.assertTrue(future.cancelled())
+        self.assertEqual(self.queue.getStats()["cancelled"], 1)
+        with self.assertRaises(g.GraphicsError):
+            inThread(lambda: self.queue.submit(abs, -1))
+
+
+if __name__ == "__main__":
+    unittest.main()
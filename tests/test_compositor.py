@@ -0,0 +1,54 @@
+"""Tests for Compositor: many sprites rendered into one image"""
+
+import unittest
+
+from support import HeadlessTestCase, g
+
+
+def solidImage(width, height, rgb):
+    image = g.Image(g.Point(0, 0), width, height)
+    image.putPixels(None, bytes(rgb) * (width * height))
+    return image
+
+
+class CompositorTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = g.Compositor(self.win)
+        self.red = solidImage(20, 20, (255, 0, 0))
+        self.blue = solidImage(20, 20, (0, 0, 255))
+
+    def test_flip_shows_the_new_sprite(self):
+        self.board.place("card", self.red, 30, 30)
+        self.assertEqual(self.board.image.getPixel(30, 30), [255, 0, 0])
+        self.board.setSprite("card", self.blue)
+        self.assertEqual(self.board.image.getPixel(30, 30), [0, 0, 255])
+        self.assertEqual(self.win.rasterize().getPixel(25, 35), [0, 0, 255])
+
+    def test_sprites_overlap_in_placing_order(self):
+        self.board.place("below", self.red, 30, 30)
+        self.board.place("above", self.blue, 40, 40)
+        self.board.setSprite("below", self.red) # recomposited, but still below
+        self.assertEqual(self.board.image.getPixel(35, 35), [0, 0, 255])
+        self.assertEqual(self.board.image.getPixel(25, 25), [255, 0, 0])
+        self.board.remove("above")
+        self.assertEqual(self.board.image.getPixel(35, 35), [255, 0, 0])
+
+    def test_moving_a_sprite_clears_its_old_place(self):
+        self.board.place("card", self.red, 30, 30)
+        self.board.place("card", self.red, 150, 70)
+        self.assertEqual(self.board.image.getPixel(30, 30), [0, 0, 0]) # transparent again
+        self.assertEqual(self.board.image.getPixel(150, 70), [255, 0, 0])
+
+    def test_only_nearby_sprites_are_visited(self):
+        for i in range(8):
+            self.board.place(i, self.red, i * 25 + 12, 12)
+        before = self.board.getStats()["spritesVisited"]
+        self.board.setSprite(7, self.blue) # (in the grid cell at the right edge)
+        self.assertLessEqual(self.board.getStats()["spritesVisited"] - before, 3)
+        self.assertEqual(self.board.image.getPixel(187, 12), [0, 0, 255])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests for graphics2's headless backend (run with: python -m pytest tests)"""
+
+import os
+import random
+import runpy
+import time
+import unittest
+
+from support import ROOT, HeadlessTestCase, g
+
+
+class RasterizeTest(HeadlessTestCase):
+
+    def test_background_and_shapes(self):
+        self.win.setBackground("white")
+        rect = g.Rectangle(g.Point(10, 10), g.Point(50, 40))
+        rect.setFill("red")
+        rect.setOutline("red")
+        rect.draw(self.win)
+        image = self.win.rasterize()
+        self.assertEqual((image.getWidth(), image.getHeight()), (200, 100))
+        self.assertEqual(image.getPixel(30, 25), [255, 0, 0])
+        self.assertEqual(image.getPixel(150, 80), [255, 255, 255])
+
+    def test_stacking_order(self):
+        below = g.Rectangle(g.Point(0, 0), g.Point(100, 100))
+        below.setFill("blue")
+        above = g.Rectangle(g.Point(20, 20), g.Point(60, 60))
+        above.setFill("yellow")
+        above.draw(self.win)
+        below.draw(self.win)
+        self.assertEqual(self.win.rasterize().getPixel(40, 40), [0, 0, 255])
+        above.undraw()
+        above.draw(self.win) # back on top
+        self.assertEqual(self.win.rasterize().getPixel(40, 40), [255, 255, 0])
+
+    def test_undrawn_items_are_left_out(self):
+        self.win.setBackground("black")
+        circle = g.Circle(g.Point(100, 50), 20)
+        circle.setFill("green")
+        circle.draw(self.win)
+        circle.undraw()
+        self.assertEqual(self.win.rasterize().getPixel(100, 50), [0, 0, 0])
+
+
+class InputTest(HeadlessTestCase):
+
+    def test_simulated_click(self):
+        self.win.simulateClick(30, 40, delay=0.1)
+        point = self.win.getMouse()
+        self.assertEqual((point.getX(), point.getY()), (30, 40))
+
+    def test_delayed_click_skips_ahead(self):
+        start = time.time()
+        self.win.simulateClick(1, 2, delay=60)
+        point = self.win.getMouse()
+        self.assertEqual((point.getX(), point.getY()), (1, 2))
+        self.assertLess(time.time() - start, 5)
+
+    def test_check_mouse(self):
+        self.assertIsNone(self.win.checkMouse())
+        self.win.simulateClick(7, 8)
+        self.win.update()
+        point = self.win.checkMouse()
+        self.assertEqual((point.getX(), point.getY()), (7, 8))
+        self.assertIsNone(self.win.checkMouse())
+
+    def test_simulated_key(self):
+        self.win.simulateKey("Return")
+        self.assertEqual(self.win.getKey(), "Return")
+
+    def test_waiting_without_input_fails(self):
+        with self.assertRaises(g.GraphicsError):
+            self.win.getMouse()
+
+
+class CardMatchGameTest(unittest.TestCase):
+
+    """Plays a round of the card match game (unchanged) with random clicks"""
+
+    # the single player button, the quit button and the card positions
+    CLICKS = [(500, 400), (800, 500)] + [((i % 7) * 100 + 250, (i // 7) * 150 + 200) for i in range(10)]
+
+    def setUp(self):
+        if g.getBackend() != "headless":
+            self.skipTest("graphics2 was already imported with the tk backend")
+        self.oldDirectory = os.getcwd()
+        os.chdir(ROOT) # the game loads its pictures from relative paths
+        self.clicks = 0
+        self.titles = []
+        g.onWindowCreated(self.startClicking)
+
+    def tearDown(self):
+        g.onWindowCreated(None)
+        os.chdir(self.oldDirectory)
+
+    def startClicking(self, win):
+        self.titles.append(win.master.title())
+        rng = random.Random(len(self.titles))
+        def click():
+            if win.isClosed(): return
+            self.clicks += 1
+            if self.clicks > 5000:
+                win.close() # give up: the game's getMouse() raises GraphicsError
+            else:
+                win.simulateClick(*rng.choice(self.CLICKS))
+                win.after(300, click)
+        win.after(300, click)
+
+    def test_single_player_round(self):
+        random.seed(3)
+        runpy.run_path(os.path.join(ROOT, "card match game.py"), run_name="__main__")
+        self.assertEqual(self.titles, ["Card Match Game", "Card Match Game", "game over"])
+        self.assertEqual(len(g._openWindows), 0) # the game closed all its windows
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+"""Tests for Image: sharing, scaling, flipping and pixel access"""
+
+import os
+import unittest
+
+from support import ROOT, HeadlessTestCase, g
+
+CARD = os.path.join(ROOT, "PNG-cards-1.3", "ace_spades.png")
+BACK = os.path.join(ROOT, "PNG-cards-1.3", "back.png")
+
+
+class CloneTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = g.Image(g.Point(0, 0), 20, 10)
+        self.image.setPixel(0, 0, "blue") # (private pixels: nothing to copy)
+        self.stats = g.Image.pixelStore.getStats()
+
+    def copiesOnWrite(self):
+        return g.Image.pixelStore.getStats()["copiesOnWrite"] - self.stats["copiesOnWrite"]
+
+    def test_clone_shares_pixels(self):
+        clone = self.image.clone()
+        self.assertIs(clone.img, self.image.img)
+        self.assertTrue(g.Image.pixelStore.isShared(self.image.img))
+        self.assertEqual(g.Image.pixelStore.getStats()["clones"], self.stats["clones"] + 1)
+        self.assertEqual(clone.getPixel(0, 0), [0, 0, 255])
+
+    def test_set_pixel_copies_once(self):
+        clone = self.image.clone()
+        clone.setPixel(1, 1, "red")
+        self.assertIsNot(clone.img, self.image.img)
+        self.assertEqual(self.image.getPixel(1, 1), [0, 0, 0]) # the original is untouched
+        self.assertEqual(clone.getPixel(1, 1), [255, 0, 0])
+        clone.setPixel(2, 2, "red")
+        self.image.setPixel(3, 3, "red") # no longer shared: no copies
+        self.assertEqual(self.copiesOnWrite(), 1)
+        self.assertFalse(g.Image.pixelStore.isShared(self.image.img))
+
+    def test_clone_of_a_scaled_image(self):
+        shared = self.image.img
+        first = self.image.clone()
+        self.image._scale(0.5, 0.5)
+        second = self.image.clone()
+        self.image.setPixel(0, 0, "red")
+        self.assertFalse(g.Image.pixelStore.isShared(shared)) # the first clone is its only user
+        first.setPixel(0, 0, "red")
+        second.setPixel(0, 0, "red")
+        self.assertEqual(self.copiesOnWrite(), 1)
+
+    def test_garbage_collected_clone_stops_sharing(self):
+        clone = self.image.clone()
+        del clone
+        self.assertFalse(g.Image.pixelStore.isShared(self.image.img))
+
+    def test_images_are_only_counted_when_tracked(self):
+        self.assertNotIn("shared", self.stats)
+        g.Image.pixelStore.trackImages()
+        try:
+            image = g.Image(g.Point(0, 0), 5, 5)
+            clone = image.clone()
+            private = g.Image(g.Point(0, 0), 5, 5)
+            stats = g.Image.pixelStore.getStats()
+            self.assertEqual((stats["shared"], stats["private"]), (2, 1))
+        finally:
+            g.Image.pixelStore.trackImages(False)
+
+
+
+class PixelRegionTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = g.Image(g.Point(0, 0), 4, 3)
+
+    def test_put_and_get_a_region(self):
+        pixels = bytes(range(2 * 2 * 3))
+        self.image.putPixels((1, 1, 2, 2), pixels)
+        self.assertEqual(self.image.getPixels((1, 1, 2, 2)), bytearray(pixels))
+        self.assertEqual(self.image.getPixel(2, 2), [9, 10, 11])
+        self.assertEqual(self.image.getPixel(0, 0), [0, 0, 0]) # outside the region
+
+    def test_whole_image_matches_get_pixel(self):
+        self.image.putPixels(None, bytes(range(36)))
+        pixels = self.image.getPixels()
+        for y in range(3):
+            for x in range(4):
+                i = (y * 4 + x) * 3
+                self.assertEqual(list(pixels[i:i + 3]), self.image.getPixel(x, y))
+
+    def test_bad_regions(self):
+        with self.assertRaises(g.GraphicsError):
+            self.image.getPixels((3, 0, 2, 1)) # too wide
+        with self.assertRaises(g.GraphicsError):
+            self.image.putPixels((0, 0, 2, 2), bytes(11)) # one byte short
+
+    @unittest.skipIf(g._numpy is None, "numpy isn't installed")
+    def test_numpy_arrays(self):
+        array = self.image.getPixels(asArray=True)
+        self.assertEqual(array.shape, (3, 4, 3))
+        array[1, 2] = (255, 128, 0)
+        self.image.putPixels(None, array)
+        self.assertEqual(self.image.getPixel(2, 1), [255, 128, 0])
+
+    @unittest.skipIf(g._numpy is not None, "numpy is installed")
+    def test_arrays_need_numpy(self):
+        with self.assertRaises(g.GraphicsError):
+            self.image.getPixels(asArray=True)
+
+
+class FlipTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = g.Image(g.Point(0, 0), 3, 2)
+        self.image.putPixels(None, bytes(range(18))) # a different color for each pixel
+
+    def test_flipped_pixels(self):
+        photo = self.image.img
+        for flipX, flipY in ((True, False), (False, True), (True, True)):
+            flipped = g.Image._tkFlip(photo, flipX, flipY)
+            for x in range(3):
+                for y in range(2):
+                    fromX, fromY = (2 - x if flipX else x), (1 - y if flipY else y)
+                    self.assertEqual(list(flipped.get(x, y)), list(photo.get(fromX, fromY)))
+
+    def test_flipped_versions_are_memoized(self):
+        photo = self.image.img
+        flipped = g.Image._tkFlip(photo, True, False)
+        self.assertIs(g.Image._tkFlip(photo, True, False), flipped)
+        self.assertIsNot(g.Image._tkFlip(photo, False, True), flipped)
+        self.assertIs(g.Image._tkFlip(photo, False, False), photo)
+
+    def test_flip_image_twice(self):
+        before = self.image.getPixels()
+        self.image.flipHorizontal()
+        self.assertEqual(self.image.getPixel(0, 0), [6, 7, 8])
+        self.image.flipHorizontal()
+        self.assertEqual(self.image.getPixels(), before)
+
+    def test_changing_a_flipped_image_keeps_the_memoized_one(self):
+        self.image.flipVertical()
+        memoized = self.image.img
+        self.image.setPixel(0, 0, "white")
+        self.assertIsNot(self.image.img, memoized)
+        self.assertEqual(list(memoized.get(0, 0)), [9, 10, 11])
+
+
+
+class ScalePlanTest(unittest.TestCase):
+
+    FACTORS = [0.09, 0.13, 0.3, 0.45, 0.5, 0.77, 1.5, 2.2, 3.7]
+
+    def test_closest_fraction_matches_a_linear_search(self):
+        floats, fractions = g.Image._generateFractionLookupTable(20, 40)
+        for i in range(1, 400):
+            factor = i / 37
+            closest = min(range(len(floats)), key=lambda j: abs(floats[j] - factor))
+            num, den = g.Image._chooseClosestUsableFraction(factor)
+            self.assertAlmostEqual(num / den, floats[closest], msg=factor)
+
+    def test_special_factors(self):
+        self.assertEqual(g.Image._chooseClosestUsableFraction(0), (0, 1))
+        self.assertEqual(g.Image._chooseClosestUsableFraction(3.0), (3, 1))
+        self.assertEqual(g.Image._chooseClosestUsableFraction(42.4), (42, 1))
+        self.assertEqual(g.Image._chooseClosestUsableFraction(0.01), (1, 100))
+        with self.assertRaises(g.GraphicsError):
+            g.Image._chooseClosestUsableFraction(101)
+
+    def test_plans_resize_by_the_closest_fraction(self):
+        for factor in self.FACTORS:
+            num, den = g.Image._chooseClosestUsableFraction(factor)
+            plan = g.Image._chooseScalePlan(factor)
+            ratio = 1.0
+            for zoom, subsample in plan:
+                ratio = ratio * zoom / subsample
+            self.assertAlmostEqual(ratio, num / den, msg=factor)
+            self.assertTrue(g.Image._keepsDetail(plan, factor), factor)
+            self.assertLessEqual(g.Image._planCost(plan), g.Image._planCost(((num, den),)), factor)
+
+    def test_subsampling_goes_first_when_it_keeps_detail(self):
+        self.assertEqual(g.Image._chooseScalePlan(0.5), ((1, 2),))
+        self.assertEqual(g.Image._chooseScalePlan(0.3), ((1, 2), (3, 5))) # 3/10, but not zooming by 3 first
+
+    def test_accurate_plans(self):
+        for factor in self.FACTORS:
+            num, den = g.Image._chooseClosestUsableFraction(factor)
+            plan = g.Image._chooseScalePlan(factor, True)
+            ratio = 1.0
+            for zoom, subsample in plan:
+                ratio = ratio * zoom / subsample
+            self.assertLessEqual(abs(ratio - factor), abs(num / den - factor), factor)
+            self.assertLessEqual(g.Image._planCost(plan), g.Image._planCost(g.Image._chooseScalePlan(factor)), factor)
+
+
+
+class LazyDecodeTest(HeadlessTestCase):
+
+    FILE = os.path.join(ROOT, "PNG-cards-1.3", "queen_hearts.png")
+
+    def setUp(self):
+        super().setUp()
+        g.Image.fileCache.clear()
+        g.Image.spriteCache.clear()
+
+    def test_file_is_decoded_when_needed(self):
+        misses = g.Image.fileCache.getStats()["misses"]
+        image = g.Image(g.Point(100, 50), self.FILE)
+        image.move(5, 5)
+        clone = image.clone()
+        self.assertFalse(image.isDecoded() or clone.isDecoded())
+        self.assertNotIn(self.FILE, g.Image.fileCache)
+        self.assertEqual((image.getWidth(), clone.getWidth()), (500, 500))
+        self.assertTrue(image.isDecoded())
+        self.assertEqual(g.Image.fileCache.getStats()["misses"], misses + 1)
+
+    def test_drawing_decodes(self):
+        image = g.Image(g.Point(100, 50), self.FILE)
+        image.draw(self.win)
+        self.assertTrue(image.isDecoded())
+
+    def test_scaling_and_flipping_happen_in_one_step(self):
+        image = g.Image(g.Point(100, 50), self.FILE)
+        image._scale(0.5, 0.5)
+        image.flipHorizontal()
+        image._scale(0.2, 0.2)
+        self.assertFalse(image.isDecoded())
+        self.assertEqual((image.getWidth(), image.getHeight()), (50, 73))
+        stats = g.Image.spriteCache.getStats()
+        self.assertEqual((stats["sprites"], stats["misses"]), (1, 1)) # no intermediate sizes
+        self.assertIs(image.img, g.Image.spriteCache.getSprite(self.FILE, -0.1, 0.1))
+
+
+class LoadTest(HeadlessTestCase):
+
+    def test_drawn_image_keeps_its_canvas_item(self):
+        image = g.Image(g.Point(100, 50), BACK)
+        image.draw(self.win)
+        itemId = image.id
+        image.load(CARD, 0.1)
+        self.assertEqual(image.id, itemId)
+        self.assertEqual(len(self.win.find_withtag(itemId)), 1)
+        self.assertIs(image.img, g.Image.spriteCache.getSprite(CARD, 0.1, 0.1))
+        self.assertEqual((image.getWidth(), image.getHeight()), (50, 73))
+        self.assertEqual(self.win.rasterize().getPixel(100, 50), image.getPixel(25, 36)) # showing the new picture
+
+    def test_load_undrawn_image(self):
+        image = g.Image(g.Point(0, 0), 5, 5)
+        image.setPixel(0, 0, "red")
+        image.load(CARD, -0.1, 0.1) # flipped
+        self.assertFalse(image.isDecoded()) # not decoded until needed
+        self.assertEqual(image.getWidth(), 50)
+        self.assertIs(image.img, g.Image.spriteCache.getSprite(CARD, -0.1, 0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
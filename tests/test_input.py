@@ -0,0 +1,74 @@
+"""Tests for the buffered clicks and key presses (GraphWin.inputEvents)"""
+
+import unittest
+
+from support import HeadlessTestCase, g
+
+
+class InputBufferTest(HeadlessTestCase):
+
+    def click(self, x, y):
+        self.win.simulateClick(x, y)
+        self.win.update()
+
+    def press(self, key):
+        self.win.simulateKey(key)
+        self.win.update()
+
+    def test_clicks_before_get_mouse_are_kept(self):
+        self.click(1, 2)
+        self.click(3, 4)
+        self.assertEqual(self.win.getMouse().getX(), 1)
+        self.assertEqual(self.win.getMouse().getX(), 3)
+
+    def test_check_mouse_returns_the_oldest_click(self):
+        self.click(1, 2)
+        self.click(3, 4)
+        self.assertEqual(self.win.checkMouse().getX(), 1)
+        self.assertEqual(self.win.checkMouse().getX(), 3)
+        self.assertIsNone(self.win.checkMouse())
+
+    def test_check_key_returns_the_oldest_key(self):
+        self.press("a")
+        self.press("b")
+        self.assertEqual((self.win.checkKey(), self.win.checkKey(), self.win.checkKey()), ("a", "b", ""))
+        self.assertEqual(self.win.lastKey, "b") # still the latest, for old code
+
+    def test_events_are_in_arrival_order(self):
+        self.click(5, 6)
+        self.press("x")
+        self.click(7, 8)
+        events = self.win.inputEvents.peek()
+        self.assertEqual([event.kind for event in events], ["click", "key", "click"])
+        self.assertEqual([(event.x, event.y) for event in events if event.kind == "click"], [(5, 6), (7, 8)])
+        self.assertLessEqual(events[0].time, events[2].time)
+        self.assertEqual(len(self.win.inputEvents), 3) # peek() leaves them buffered
+
+    def test_pop_by_kind(self):
+        self.click(5, 6)
+        self.press("x")
+        buffer = self.win.inputEvents
+        self.assertEqual(buffer.pop("key").key, "x")
+        self.assertIsNone(buffer.pop("key"))
+        self.assertEqual(buffer.pop().point.getX(), 5)
+        self.assertIsNone(buffer.pop())
+
+    def test_drain(self):
+        for i in range(3):
+            self.click(i, i)
+        self.press("q")
+        self.assertEqual([event.x for event in self.win.inputEvents.drain("click")], [0, 1, 2])
+        self.assertEqual(self.win.inputEvents.count(), 1)
+        self.assertEqual(self.win.inputEvents.getStats()["handled"], 3)
+
+    def test_overflow_drops_the_oldest(self):
+        self.assertEqual(self.win.inputEvents.capacity, 64)
+        for i in range(70):
+            self.click(i, 0)
+        stats = self.win.inputEvents.getStats()
+        self.assertEqual((stats["received"], stats["dropped"], stats["buffered"]), (70, 6, 64))
+        self.assertEqual(self.win.getMouse().getX(), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Tests for the shapes, Vec2, and groups and layers of shapes"""
+
+import unittest
+
+from support import HeadlessTestCase, g
+
+
+class PolygonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.poly = g.Polygon(g.Point(0, 0), g.Point(10, 0), g.Point(10, 20))
+
+    def test_points(self):
+        self.assertEqual([(p.getX(), p.getY()) for p in self.poly.points], [(0, 0), (10, 0), (10, 20)])
+        self.poly.points[0].move(5, 5) # a copy: the polygon doesn't change
+        self.assertEqual(self.poly.getPoints()[0].getX(), 0)
+
+    def test_setting_points(self):
+        self.assertEqual(self.poly.getShapeWidth(), 10) # (caches the bounds)
+        self.poly.points = [g.Point(-5, 0), g.Point(30, 40)]
+        self.assertEqual([(p.getX(), p.getY()) for p in self.poly.getPoints()], [(-5, 0), (30, 40)])
+        self.assertEqual(self.poly.getShapeWidth(), 35)
+
+    def test_move_and_clone(self):
+        clone = self.poly.clone()
+        self.poly.move(1, 2)
+        self.assertEqual(self.poly.getCenter().getX(), 6)
+        self.assertEqual(clone.getCenter().getX(), 5)
+
+
+
+class VecTest(unittest.TestCase):
+
+    def test_getters(self):
+        rect = g.Rectangle(g.Point(0, 0), g.Point(10, 20))
+        self.assertEqual(rect.getP1Vec(), g.Vec2(0, 0))
+        self.assertEqual(rect.getP2Vec(), g.Vec2(10, 20))
+        self.assertEqual(rect.getCenterVec(), g.Vec2(5, 10))
+        self.assertEqual(g.Circle(g.Point(3, 4), 2).getCenterVec(), g.Vec2(3, 4))
+        self.assertEqual(g.Polygon(g.Point(0, 0), g.Point(4, 2)).getCenterVec(), g.Vec2(2, 1))
+        self.assertEqual(g.Text(g.Point(7, 8), "hi").getCenterVec(), g.Vec2(7, 8))
+
+    def test_getters_reuse_the_last_vec(self):
+        rect = g.Rectangle(g.Point(0, 0), g.Point(10, 20))
+        center = rect.getCenterVec()
+        self.assertIs(rect.getCenterVec(), center)
+        self.assertIs(rect.getP1Vec(), rect.getP1Vec())
+        rect.move(1, 1)
+        self.assertEqual(rect.getCenterVec(), g.Vec2(6, 11))
+        self.assertEqual(center, g.Vec2(5, 10)) # the old one doesn't change
+
+    def test_vec2_is_immutable(self):
+        vec = g.Vec2(1, 2)
+        with self.assertRaises(AttributeError):
+            vec.x = 5
+        self.assertIs(vec.clone(), vec)
+        self.assertEqual(vec + g.Vec2(1, 1), g.Vec2(2, 3))
+        self.assertEqual((vec - g.Vec2(1, 1)) * 2, g.Vec2(0, 2))
+        self.assertEqual(tuple(vec), (1, 2))
+        self.assertEqual(len({vec, g.Vec2(1, 2)}), 1)
+        point = vec.toPoint()
+        self.assertEqual((point.getX(), point.getY()), (1, 2))
+
+
+
+def filledRectangle(x1, y1, x2, y2, color):
+    rect = g.Rectangle(g.Point(x1, y1), g.Point(x2, y2))
+    rect.setFill(color)
+    return rect
+
+
+class GroupTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.shapes = [filledRectangle(i * 20, 0, i * 20 + 10, 10, "red") for i in range(3)]
+        self.group = g.Group(*self.shapes)
+
+    def test_draw_and_undraw_together(self):
+        self.group.draw(self.win)
+        self.assertEqual(len(self.win.find_withtag(self.group.tag)), 3)
+        self.group.undraw()
+        self.assertEqual(len(self.win.find_withtag(self.group.tag)), 0)
+        self.assertEqual(len(self.win.items), 0)
+        self.assertEqual(self.group.getMembers(), self.shapes) # still members
+        self.group.draw(self.win)
+        self.assertEqual(len(self.win.find_withtag(self.group.tag)), 3)
+
+    def test_members_undrawn_one_at_a_time_stay(self):
+        self.group.draw(self.win)
+        self.shapes[0].undraw()
+        self.assertIn(self.shapes[0], self.group.getMembers())
+        self.shapes[0].draw(self.win) # tagged again
+        self.assertEqual(len(self.win.find_withtag(self.group.tag)), 3)
+        self.group.remove(self.shapes[0])
+        self.assertEqual(len(self.win.find_withtag(self.group.tag)), 2)
+
+    def test_move_and_recolor(self):
+        self.group.draw(self.win)
+        self.group.move(0, 50)
+        self.group.setFill("blue")
+        self.assertEqual(self.shapes[1].getP1().getY(), 50)
+        self.assertEqual(self.win.rasterize().getPixel(25, 55), [0, 0, 255])
+
+
+class LayerTest(HeadlessTestCase):
+
+    def test_layers_keep_their_order(self):
+        hud = filledRectangle(0, 0, 50, 50, "red")
+        self.win.getLayer("hud").add(hud)
+        hud.draw(self.win)
+        background = filledRectangle(0, 0, 100, 100, "blue")
+        self.win.getLayer("background").add(background)
+        background.draw(self.win) # drawn later, but still below
+        self.assertEqual(self.win.rasterize().getPixel(25, 25), [255, 0, 0])
+
+    def test_undrawn_objects_leave_the_layer_members(self):
+        layer = self.win.getLayer("board")
+        card = filledRectangle(0, 0, 50, 50, "red")
+        layer.add(card)
+        self.assertEqual(layer.getMembers(), [card]) # waiting to be drawn
+        card.draw(self.win)
+        card.undraw()
+        self.assertEqual(layer.getMembers(), [])
+        self.assertIs(card._layer, layer) # but it still belongs to the layer
+        cover = filledRectangle(0, 0, 50, 50, "blue")
+        self.win.getLayer("hud").add(cover)
+        cover.draw(self.win)
+        card.draw(self.win)
+        self.assertEqual(layer.getMembers(), [card])
+        self.assertEqual(self.win.rasterize().getPixel(25, 25), [0, 0, 255]) # back in its layer, below the hud
+
+
+if __name__ == "__main__":
+    unittest.main()
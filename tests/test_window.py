@@ -0,0 +1,247 @@
+"""Tests for GraphWin: batching, the item registry, coordinates, plotting and timers"""
+
+import time
+import unittest
+
+from support import HeadlessTestCase, g
+
+
+class BatchTest(HeadlessTestCase):
+
+    def drawCircles(self, win, count):
+        for i in range(count):
+            g.Circle(g.Point(i * 10, 50), 5).draw(win)
+
+    def test_batch_updates_once(self):
+        before = self.win.getBatchStats()
+        with self.win.batch():
+            self.drawCircles(self.win, 5)
+        stats = self.win.getBatchStats()
+        self.assertEqual(stats["batches"] - before["batches"], 1)
+        self.assertEqual(stats["updates"] - before["updates"], 1)
+        self.assertEqual(stats["coalescedUpdates"] - before["coalescedUpdates"], 5)
+
+    def test_nested_batches_count_once(self):
+        with self.win.batch():
+            with self.win.batch():
+                self.drawCircles(self.win, 2)
+            self.assertEqual(self.win.getBatchStats()["batches"], 0)
+        self.assertEqual(self.win.getBatchStats()["batches"], 1)
+
+    def test_batched_decorator(self):
+        g.batched(self.drawCircles)(self.win, 3)
+        stats = self.win.getBatchStats()
+        self.assertEqual((stats["batches"], stats["coalescedUpdates"]), (1, 3))
+
+    def test_batch_ends_after_an_error(self):
+        with self.assertRaises(ValueError):
+            with self.win.batch():
+                raise ValueError()
+        self.drawCircles(self.win, 1)
+        self.assertEqual(self.win.getBatchStats()["coalescedUpdates"], 0)
+
+
+
+class ItemRegistryTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.shapes = [g.Circle(g.Point(i * 10, 50), 5) for i in range(4)]
+        for shape in self.shapes:
+            shape.draw(self.win)
+
+    def test_items_in_drawing_order(self):
+        self.assertEqual(list(self.win.items), self.shapes)
+        self.shapes[1].undraw()
+        self.assertEqual(list(self.win.items), [self.shapes[0]] + self.shapes[2:])
+        self.shapes[1].draw(self.win)
+        self.assertIs(list(self.win.items)[-1], self.shapes[1])
+
+    def test_clear(self):
+        ids = [shape.id for shape in self.shapes]
+        self.win.clear()
+        self.assertEqual(len(self.win.items), 0)
+        self.assertFalse(any(self.win.find_withtag(id) for id in ids))
+        self.shapes[0].draw(self.win) # cleared shapes can be drawn again
+        self.assertEqual(list(self.win.items), [self.shapes[0]])
+
+    def test_clear_removes_plotted_pixels(self):
+        self.win.setBackground("white")
+        self.win.plotPixel(5, 5, "red")
+        self.win.clear()
+        self.assertEqual(self.win.rasterize().getPixel(5, 5), [255, 255, 255])
+
+
+
+class SetCoordsTest(HeadlessTestCase):
+
+    def test_items_are_moved_in_place(self):
+        rect = g.Rectangle(g.Point(1, 1), g.Point(3, 2))
+        image = g.Image(g.Point(10, 5), 4, 4)
+        shapes = [rect, g.Line(g.Point(0, 0), g.Point(20, 10)), g.Text(g.Point(10, 5), "hi"), image]
+        for shape in shapes:
+            shape.draw(self.win)
+        ids = [shape.id for shape in shapes]
+        self.win.setCoords(0, 0, 20, 10) # 10 pixels per unit, y going up
+        self.assertEqual([shape.id for shape in shapes], ids) # the same canvas items
+        self.assertEqual(self.win.coords(rect.id), [*self.win.toScreen(1, 1), *self.win.toScreen(3, 2)])
+        self.assertEqual(self.win.coords(image.id), list(self.win.toScreen(10, 5)))
+        self.assertEqual(self.win.toScreen(1, 1)[0], 10)
+
+    def test_drawing_after_set_coords(self):
+        self.win.setBackground("white")
+        rect = g.Rectangle(g.Point(2, 2), g.Point(4, 4))
+        rect.setFill("red")
+        rect.draw(self.win)
+        self.win.setCoords(0, 0, 10, 5) # 20 pixels per unit
+        raster = self.win.rasterize()
+        self.assertEqual(raster.getPixel(60, 40), [255, 0, 0])
+        self.assertEqual(raster.getPixel(3, 3), [255, 255, 255]) # not at its old place
+
+
+
+class FramebufferTest(HeadlessTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.framebuffer = self.win.getFramebuffer()
+
+    def test_plotted_pixels(self):
+        self.win.setBackground("white")
+        self.win.plot(10, 20, "light gray") # (a color name with a space)
+        self.win.plotPixel(11, 20, "red")
+        raster = self.win.rasterize()
+        self.assertEqual(raster.getPixel(10, 20), [211, 211, 211])
+        self.assertEqual(raster.getPixel(11, 20), [255, 0, 0])
+
+    def test_pixels_wait_for_a_flush(self):
+        self.win.autoflush = False
+        self.win.plotPixel(5, 6, "red")
+        self.win.plotPixel(2, 9, "red")
+        self.win.plotPixel(500, 6, "red") # outside the window: ignored
+        self.assertEqual(self.framebuffer.getDirtyRegion(), (2, 6, 6, 10))
+        self.framebuffer.flush()
+        self.assertIsNone(self.framebuffer.getDirtyRegion())
+        self.assertEqual(list(self.framebuffer.img.get(5, 6)), [255, 0, 0])
+
+    def test_a_filled_rectangle_is_one_put(self):
+        with self.win.batch(): # (each update would flush)
+            for x in range(10):
+                for y in range(5):
+                    self.win.plotPixel(x, y, "blue")
+        self.assertEqual(list(self.framebuffer.img.get(9, 4)), [0, 0, 255])
+        stats = self.framebuffer.getStats()
+        self.assertEqual((stats["pixels"], stats["flushes"], stats["puts"]), (50, 1, 1))
+
+    def test_scattered_pixels_are_put_in_runs(self):
+        with self.win.batch():
+            for x in (0, 1, 2, 7, 8):
+                self.win.plotPixel(x, 0, "blue")
+            self.win.plotPixel(4, 3, "blue")
+        self.assertEqual(self.framebuffer.getStats()["puts"], 3)
+
+    def test_new_pixels_go_on_top(self):
+        self.win.plotPixel(30, 30, "red")
+        self.framebuffer.flush()
+        rect = g.Rectangle(g.Point(20, 20), g.Point(40, 40))
+        rect.setFill("blue")
+        rect.draw(self.win)
+        self.assertEqual(self.win.rasterize().getPixel(30, 30), [0, 0, 255])
+        self.win.plotPixel(31, 31, "red")
+        self.assertEqual(self.win.rasterize().getPixel(30, 30), [255, 0, 0])
+
+    def test_blit(self):
+        self.framebuffer.blit(1, 1, 2, 1, bytes([255, 0, 0, 0, 255, 0]))
+        self.assertEqual(list(self.framebuffer.img.get(2, 1)), [0, 255, 0])
+        with self.assertRaises(g.GraphicsError):
+            self.framebuffer.blit(199, 0, 2, 1, bytes(6))
+
+
+
+class MemoryReportTest(HeadlessTestCase):
+
+    def users(self):
+        return [user for entry in g.memory_report()["images"] for user in entry["usedBy"]]
+
+    def test_closing_frees_the_window_images(self):
+        image = g.Image(g.Point(50, 50), 30, 20)
+        image.draw(self.win)
+        self.win.plotPixel(1, 1, "red")
+        before = g.memory_report()["totalBytes"]
+        self.assertIn("drawn Image #{}".format(image.imageId), self.users())
+        self.assertIn("window resource: test", self.users()) # the framebuffer
+        self.win.close()
+        self.assertNotIn(image.imageId, g.Image.imageCache)
+        self.assertIsNone(image.canvas)
+        users = self.users()
+        self.assertNotIn("drawn Image #{}".format(image.imageId), users)
+        self.assertNotIn("window resource: test", users)
+        self.assertEqual(g.memory_report()["totalBytes"], before - 30 * 20 * 4 - 200 * 100 * 4)
+
+    def test_entries(self):
+        image = g.Image(g.Point(50, 50), 30, 20)
+        image.draw(self.win)
+        entry = [entry for entry in g.memory_report()["images"] if entry["name"] == str(image.img)][0]
+        self.assertEqual((entry["width"], entry["height"], entry["bytes"]), (30, 20, 2400))
+
+
+
+class TimerTest(HeadlessTestCase):
+
+    def test_schedule(self):
+        runs = []
+        timer = self.win.schedule(0.5, runs.append, "ran")
+        self.assertTrue(timer.isActive())
+        self.win.pause(0.2)
+        self.assertEqual(runs, [])
+        self.win.pause(0.5)
+        self.assertEqual((runs, timer.runs, timer.isActive()), (["ran"], 1, False))
+
+    def test_cancel(self):
+        runs = []
+        timer = self.win.schedule(0.5, runs.append, "ran")
+        self.assertTrue(timer.cancel())
+        self.assertFalse(timer.cancel()) # already cancelled
+        self.win.pause(1)
+        self.assertEqual(runs, [])
+
+    def test_repeating(self):
+        runs = []
+        timer = self.win.scheduleRepeating(0.1, lambda: runs.append(len(runs)))
+        self.win.pause(0.55)
+        timer.cancel()
+        self.assertEqual(runs, [0, 1, 2, 3, 4])
+        self.win.pause(0.5)
+        self.assertEqual(len(runs), 5)
+
+    def test_repeating_timer_can_cancel_itself(self):
+        def tick():
+            if timer.runs == 3:
+                timer.cancel()
+        timer = self.win.scheduleRepeating(0.1, tick)
+        self.win.pause(1)
+        self.assertEqual((timer.runs, timer.isActive()), (3, False))
+
+    def test_pause_keeps_virtual_time(self):
+        start = time.time()
+        self.win.pause(30) # the headless clock skips ahead
+        self.assertLess(time.time() - start, 5)
+
+    def test_timer_fed_get_mouse(self):
+        self.win.schedule(2, self.win.simulateClick, 10, 20)
+        point = self.win.getMouse()
+        self.assertEqual((point.getX(), point.getY()), (10, 20))
+
+    def test_closing_the_window(self):
+        runs = []
+        timer = self.win.schedule(5, runs.append, "ran")
+        self.win.schedule(0.1, self.win.close)
+        self.win.pause(1) # returns early
+        self.assertTrue(self.win.isClosed())
+        self.assertFalse(timer.isActive())
+        with self.assertRaises(g.GraphicsError):
+            self.win.schedule(1, runs.append, "too late")
+
+
+if __name__ == "__main__":
+    unittest.main()